@@ -0,0 +1,182 @@
+"""
+Stress tests CityCache lookups from many threads while a writer keeps adding cities.
+
+Reader threads resolve a mix of canonical names, fuzzy aliases and names
+missing from the city data, like Client.get_city does. A writer thread adds
+new cities in batches at the same time, so every write swaps the snapshots
+under the readers. Every lookup is checked against the city it should resolve
+to, and the harness reports:
+
+- throughput, in lookups per second for every thread count,
+- correctness, the amount of lookups which returned a wrong city,
+- the cache counters, hits, misses, unresolved rate and LRU evictions.
+
+Run with ``python benchmarks/city_cache.py --help``.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pikudhaoref.cache import CityCache  # noqa: E402
+from pikudhaoref.city import City  # noqa: E402
+from pikudhaoref.matching import CityNameIndex  # noqa: E402
+
+LANGUAGES = ("he", "en", "ru", "ar", "es")
+
+
+def create_city(i: int, zones: int = 30) -> dict:
+    return {
+        **{language: f"{language} city {i}" for language in LANGUAGES},
+        "area": {language: f"{language} zone {i % zones}" for language in LANGUAGES},
+        "countdown": (0, 15, 30, 45, 60, 90)[i % 6],
+        "lat": 31 + (i % 200) / 100,
+        "lng": 34 + (i // 200) / 100,
+        "__id": i,
+    }
+
+
+def create_lookups(
+    cities: int, amount: int, alias_rate: float, unknown_rate: float, seed: int
+) -> List[Tuple[str, Optional[int]]]:
+    """
+    Creates the names to look up and the city id each should resolve to, None for unknown names.
+    """
+
+    generator = random.Random(seed)
+    lookups = []
+
+    for _ in range(amount):
+        i = generator.randrange(cities)
+        x = generator.random()
+
+        if x < unknown_rate:
+            lookups.append((f"unknown place {generator.randrange(amount)}", None))
+        elif x < unknown_rate + alias_rate:
+            lookups.append((f"en city {i} ", i))  # Matched after normalization.
+        else:
+            lookups.append((f"{generator.choice(LANGUAGES)} city {i}", i))
+
+    return lookups
+
+
+class Stress:
+    """
+    Runs the readers and the writer over a shared cache.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.city_data = [create_city(i) for i in range(args.cities)]
+        self.index = CityNameIndex(self.city_data)
+        self.cache = CityCache(args.maxsize, args.max_aliases)
+        self.cache.add_many(City.from_dict(city) for city in self.city_data)
+
+        self.errors = 0
+        self._errors_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def get_city(self, city_name: str):
+        city = self.cache.get(city_name)
+
+        if city is None:
+            city = City.from_city_name(city_name, self.city_data, self.index)
+            city = self.cache.add_resolved(city_name, city)
+
+        return city
+
+    def read(self, lookups: List[Tuple[str, Optional[int]]], start: threading.Barrier):
+        errors = 0
+        start.wait()
+
+        for city_name, city_id in lookups:
+            city = self.get_city(city_name)
+            if city.id != city_id:
+                errors += 1
+
+        with self._errors_lock:
+            self.errors += errors
+
+    def write(self) -> None:
+        next_id = self.args.cities
+
+        while not self._stop.is_set():
+            batch = [create_city(i) for i in range(next_id, next_id + 10)]
+            self.cache.add_many(City.from_dict(city) for city in batch)
+            next_id += len(batch)
+
+            time.sleep(0.001)
+
+    def run(self, threads: int) -> float:
+        lookups = [
+            create_lookups(
+                self.args.cities,
+                self.args.lookups,
+                self.args.alias_rate,
+                self.args.unknown_rate,
+                self.args.seed + i,
+            )
+            for i in range(threads)
+        ]
+
+        start = threading.Barrier(threads + 1)
+        readers = [threading.Thread(target=self.read, args=(x, start)) for x in lookups]
+        writer = threading.Thread(target=self.write)
+
+        for reader in readers:
+            reader.start()
+
+        self._stop.clear()
+        writer.start()
+        start.wait()
+        started_at = time.perf_counter()
+
+        for reader in readers:
+            reader.join()
+
+        elapsed = time.perf_counter() - started_at
+        self._stop.set()
+        writer.join()
+
+        return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--cities", type=int, default=1500)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--alias-rate", type=float, default=0.05)
+    parser.add_argument("--unknown-rate", type=float, default=0.01)
+    parser.add_argument("--maxsize", type=int, default=1024)
+    parser.add_argument("--max-aliases", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.cities:,} cities, {args.lookups:,} lookups per thread\n")
+    passed = True
+
+    for threads in args.threads:
+        stress = Stress(args)
+        elapsed = stress.run(threads)
+        cache = stress.cache
+
+        print(
+            f"{threads:>3} threads {threads * args.lookups / elapsed:>14,.0f} lookups/s"
+            f"  errors {stress.errors:,}  hits {cache.hits:,}  misses {cache.misses:,}"
+            f"  unresolved {cache.unresolved_rate:.2%}  evictions {cache.evictions:,}"
+        )
+
+        passed &= not stress.errors
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
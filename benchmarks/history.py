@@ -0,0 +1,119 @@
+"""
+Benchmarks building history sirens on a synthetic 50k-row fixture:
+the per-row path get_history used before (mutate the row, Siren.from_raw)
+against Siren.from_raw_many.
+
+Run with ``python benchmarks/history.py``.
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pikudhaoref import City, Siren  # noqa: E402
+from pikudhaoref.cache import CityCache  # noqa: E402
+from pikudhaoref.matching import CityNameIndex  # noqa: E402
+
+ROWS = 50_000
+CITIES = 1_500
+
+
+def create_city_data(amount: int) -> list:
+    return [
+        {
+            "he": f"עיר {i}",
+            "en": f"City {i}",
+            "ru": f"Город {i}",
+            "ar": f"مدينة {i}",
+            "es": f"Ciudad {i}",
+            "area": {
+                "he": f"אזור {i % 30}",
+                "en": f"Zone {i % 30}",
+                "ru": f"Зона {i % 30}",
+                "ar": f"منطقة {i % 30}",
+                "es": f"Zona {i % 30}",
+            },
+            "countdown": random.choice([0, 15, 30, 45, 60, 90]),
+            "lat": 31 + random.random() * 2,
+            "lng": 34 + random.random(),
+            "__id": i,
+        }
+        for i in range(amount)
+    ]
+
+
+def create_history(amount: int) -> list:
+    start = datetime(2023, 10, 7, 6, 29)
+    rows = []
+
+    for i in range(amount):
+        # Barrages: many cities share the same alertDate.
+        date = start + timedelta(seconds=(i // 40) * 17)
+        rows.append(
+            {
+                "data": f"עיר {random.randrange(CITIES)}",
+                "date": date.strftime("%d.%m.%Y"),
+                "time": date.strftime("%H:%M:%S"),
+                "alertDate": date.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+        )
+
+    return rows
+
+
+def create_get_city(city_data: list):
+    cache = CityCache()
+    index = CityNameIndex(city_data)
+    cache.add_many(City.from_dict(city) for city in city_data)
+
+    def get_city(city_name: str):
+        city = cache.get(city_name)
+        if city is None:
+            city = City.from_city_name(city_name, city_data, index)
+            city = cache.add_resolved(city_name, city)
+
+        return city
+
+    return get_city
+
+
+def per_row(rows: list, get_city) -> list:
+    for row in rows:
+        row["data"] = get_city(row["data"])
+
+    return [Siren.from_raw(x) for x in rows]
+
+
+def measure(name: str, function, repeat: int = 3) -> float:
+    best = float("inf")
+
+    for _ in range(repeat):
+        rows = [dict(x) for x in HISTORY]  # per_row mutates the rows.
+
+        start = time.perf_counter()
+        function(rows)
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{name:<28}{best * 1000:>10.1f} ms{ROWS / best:>14,.0f} rows/s")
+    return best
+
+
+if __name__ == "__main__":
+    random.seed(0)
+
+    CITY_DATA = create_city_data(CITIES)
+    HISTORY = create_history(ROWS)
+    GET_CITY = create_get_city(CITY_DATA)
+
+    print(f"{ROWS:,} rows, {CITIES:,} cities\n")
+
+    before = measure("per row (from_raw)", lambda rows: per_row(rows, GET_CITY))
+    after = measure(
+        "bulk (from_raw_many)", lambda rows: Siren.from_raw_many(rows, GET_CITY)
+    )
+
+    print(f"\nspeedup: {before / after:.1f}x")
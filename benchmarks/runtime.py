@@ -0,0 +1,142 @@
+"""
+Benchmarks the poll-to-dispatch latency of AsyncClient on every runtime:
+the default asyncio loop, uvloop (if installed) and a background loop thread.
+
+The HTTP layer is replaced by an in-process timeline which alternates between
+a siren and no siren, so the latency is the time from the poll response to the
+on_siren handler, and for the background thread also to a sync host thread.
+
+Run with ``python benchmarks/runtime.py``.
+"""
+
+import asyncio
+import os
+import queue
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pikudhaoref import AsyncClient  # noqa: E402
+from pikudhaoref.http import AsyncHTTPClient  # noqa: E402
+from pikudhaoref.runtime import (  # noqa: E402
+    gil_enabled,
+    new_event_loop,
+    uvloop_available,
+)
+
+SAMPLES = 2_000
+CITY = "תל אביב - מרכז העיר"
+CITY_DATA = [
+    {
+        "he": CITY,
+        "en": "Tel Aviv - City Center",
+        "ru": "Тель-Авив - центр города",
+        "ar": "تل أبيب - مركز المدينة",
+        "es": "Tel Aviv - Centro de la ciudad",
+        "area": {
+            "he": "דן",
+            "en": "Dan",
+            "ru": "Дан",
+            "ar": "دان",
+            "es": "Dan",
+        },
+        "countdown": 90,
+        "lat": 32.0679,
+        "lng": 34.7604,
+        "__id": 1,
+    }
+]
+
+
+class Timeline:
+    def __init__(self):
+        self.tick = 0
+        self.returned_at = 0.0
+
+    async def initialize_city_data(self, http: AsyncHTTPClient) -> None:
+        http.city_data = CITY_DATA
+
+    async def get_current_sirens(self, http: AsyncHTTPClient) -> list:
+        self.tick += 1
+        self.returned_at = time.perf_counter()
+
+        return [CITY] if self.tick % 2 else []
+
+
+TIMELINE = Timeline()
+AsyncHTTPClient.initialize_city_data = lambda self: TIMELINE.initialize_city_data(self)
+AsyncHTTPClient.get_current_sirens = lambda self: TIMELINE.get_current_sirens(self)
+
+
+def listen(client: AsyncClient, latencies: list, done, host: queue.SimpleQueue = None):
+    @client.event()
+    async def on_siren(sirens):
+        now = time.perf_counter()
+        latencies.append(now - TIMELINE.returned_at)
+
+        if host is not None:
+            host.put((TIMELINE.returned_at, len(latencies)))
+
+        if len(latencies) >= SAMPLES:
+            done()
+
+
+def run_loop(use_uvloop: bool) -> list:
+    latencies = []
+
+    async def main():
+        finished = asyncio.Event()
+        client = AsyncClient(update_interval=0)
+        listen(client, latencies, finished.set)
+
+        await finished.wait()
+        await client.__aexit__(None, None, None)
+
+    loop = new_event_loop(use_uvloop)
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+    return latencies
+
+
+def run_background() -> tuple:
+    latencies, host_latencies = [], []
+    host = queue.SimpleQueue()
+
+    client = AsyncClient(update_interval=0, background=True)
+    listen(client, latencies, lambda: None, host)
+
+    while len(host_latencies) < SAMPLES:
+        returned_at, _ = host.get()
+        host_latencies.append(time.perf_counter() - returned_at)
+
+    client.close()
+    return latencies, host_latencies
+
+
+def report(name: str, latencies: list) -> None:
+    latencies = sorted(x * 1e6 for x in latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+    print(f"{name:<32}{p50:>10.1f} µs{p99:>12.1f} µs")
+
+
+if __name__ == "__main__":
+    print(f"{SAMPLES:,} sirens, GIL {'enabled' if gil_enabled() else 'disabled'}\n")
+    print(f"{'runtime':<32}{'p50':>13}{'p99':>15}")
+
+    report("asyncio", run_loop(False))
+
+    if uvloop_available():
+        report("uvloop", run_loop(True))
+    else:
+        print(f"{'uvloop':<32}{'not installed':>28}")
+
+    handler, host = run_background()
+    report("background thread (handler)", handler)
+    report("background thread (host)", host)
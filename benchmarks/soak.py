@@ -0,0 +1,414 @@
+"""
+Soak tests SyncClient and AsyncClient against a local fake oref server
+which replays a deterministic, seeded alert timeline.
+
+Every tick the alert list is a new barrage of cities (with a share of names
+missing from the city data), and every --clear-every ticks it is empty so
+the sirens end. The harness reports:
+
+- throughput, in polls and new sirens per second,
+- per-tick latency percentiles, from the server response to the last event handler,
+- memory growth, with tracemalloc and the city cache size (the recent
+  sirens buffer also grows until its window is full),
+- event correctness, against the events expected from the timeline.
+
+Run with ``python benchmarks/soak.py --help``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pikudhaoref import AsyncClient, SyncClient  # noqa: E402
+from pikudhaoref.abc import HTTPClient  # noqa: E402
+
+LANGUAGES = ("he", "en", "ru", "ar", "es")
+
+
+def create_city_data(amount: int, zones: int = 30) -> dict:
+    """
+    Creates city data in the upstream cities.json format.
+    """
+
+    return {
+        "areas": {
+            str(i): {language: f"{language} zone {i}" for language in LANGUAGES}
+            for i in range(zones)
+        },
+        "cities": {
+            f"he city {i}": {
+                "id": i,
+                **{language: f"{language} city {i}" for language in LANGUAGES},
+                "area": i % zones,
+                "countdown": (0, 15, 30, 45, 60, 90)[i % 6],
+                "lat": 31 + (i % 200) / 100,
+                "lng": 34 + (i // 200) / 100,
+            }
+            for i in range(amount)
+        },
+    }
+
+
+def create_timeline(
+    city_data: dict,
+    ticks: int,
+    barrage: int,
+    unknown_rate: float,
+    clear_every: int,
+    seed: int,
+) -> List[List[str]]:
+    """
+    Creates the alert list of every tick.
+    Names missing from the city data are unique per tick, like misspellings the API sometimes returns.
+    """
+
+    generator = random.Random(seed)
+    names = list(city_data["cities"])
+    timeline = []
+
+    for tick in range(ticks):
+        if clear_every and tick % clear_every == clear_every - 1:
+            timeline.append([])
+            continue
+
+        frame = generator.sample(names, min(barrage, len(names)))
+        for i, _ in enumerate(frame):
+            if generator.random() < unknown_rate:
+                frame[i] = f"unknown place {tick}-{i}"
+
+        timeline.append(frame)
+
+    return timeline
+
+
+def expected_events(timeline: List[List[str]]) -> List[Dict[str, Set[str]]]:
+    """
+    Returns the events every tick should call, modelled after Client._diff_sirens:
+    cities are new until the alert list is empty, which ends all of them.
+    """
+
+    known: Set[str] = set()
+    expected = []
+
+    for frame in timeline:
+        events = {}
+
+        new = set(frame) - known
+        if new:
+            known |= new
+            events["on_siren"] = new
+
+        if not frame and known:
+            events["on_siren_end"] = known
+            known = set()
+
+        expected.append(events)
+
+    return expected
+
+
+class FakeOrefServer:
+    """
+    A local HTTP server which serves the city data and replays the timeline, one frame per alerts.json request.
+    """
+
+    def __init__(self, city_data: dict, timeline: List[List[str]]):
+        self.timeline = timeline
+        self.city_data = json.dumps(city_data, ensure_ascii=False).encode()
+        self.frames = [
+            json.dumps({"data": frame}, ensure_ascii=False).encode() if frame else b""
+            for frame in timeline
+        ]
+
+        self.requests = 0
+        self.served_at: List[float] = []
+        self.finished = threading.Event()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def tick(self) -> int:
+        return self.requests - 1  # The tick of the last served frame.
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/cities.json"):
+                    body = server.city_data
+                elif self.path.startswith("/alerts.json"):
+                    body = server.next_frame()
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def next_frame(self) -> bytes:
+        # Polls are sequential, so this request means the previous tick was dispatched.
+        if self.requests >= len(self.frames):
+            self.finished.set()
+            return b""
+
+        frame = self.frames[self.requests]
+        self.requests += 1
+        self.served_at.append(time.perf_counter())
+
+        return frame
+
+    @contextmanager
+    def running(self):
+        urls = HTTPClient.CITIES_URL, HTTPClient.ALERTS_URL
+
+        HTTPClient.CITIES_URL = f"{self.url}/cities.json"
+        HTTPClient.ALERTS_URL = f"{self.url}/alerts.json"
+        self._thread.start()
+
+        try:
+            yield self
+        finally:
+            HTTPClient.CITIES_URL, HTTPClient.ALERTS_URL = urls
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class Recorder:
+    """
+    Records the events of every tick and samples the memory usage.
+    """
+
+    def __init__(self, server: FakeOrefServer, samples: int = 10):
+        self.server = server
+        self.events: Dict[int, Dict[str, Set[str]]] = {}
+        self.dispatched_at: Dict[int, float] = {}
+        self.handler_calls = 0
+        # Tick, traced bytes and cached names.
+        self.memory: List[Tuple[int, int, int]] = []
+        self._sample_every = max(1, len(server.frames) // samples)
+
+    def record(self, client, name: str, sirens: list) -> None:
+        tick = self.server.tick
+        self.events.setdefault(tick, {})[name] = {
+            client._city_key(siren.city) for siren in sirens
+        }
+        self.dispatched_at[tick] = time.perf_counter()
+
+        if name == "on_siren" and tick % self._sample_every == 0:
+            self.sample(client, tick)
+
+    def sample(self, client, tick: int) -> None:
+        self.memory.append(
+            (tick, tracemalloc.get_traced_memory()[0], len(client.city_cache.names))
+        )
+
+    def count(self, *args) -> None:
+        self.handler_calls += 1
+
+
+def register(client, recorder: Recorder, handlers: int, is_async: bool) -> None:
+    for name in ("on_siren", "on_siren_end"):
+        for _ in range(handlers):
+            if is_async:
+
+                async def handler(sirens):
+                    recorder.count()
+
+            else:
+
+                def handler(sirens):
+                    recorder.count()
+
+            client.add_event(handler, name)
+
+        # Registered last, so the dispatch time covers every handler.
+        if is_async:
+
+            async def record(sirens, name=name):
+                recorder.record(client, name, sirens)
+
+        else:
+
+            def record(sirens, name=name):
+                recorder.record(client, name, sirens)
+
+        client.add_event(record, name)
+
+
+class GatedSyncClient(SyncClient):
+    """
+    A SyncClient which polls only once started, SyncClient polls from its constructor
+    and the first ticks would be dispatched before the handlers are registered.
+    """
+
+    __slots__ = ("started",)
+
+    def __init__(self, *args, **kwargs):
+        self.started = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _handle_sirens(self):
+        self.started.wait()
+        super()._handle_sirens()
+
+
+def run_sync(server: FakeOrefServer, recorder: Recorder, args) -> SyncClient:
+    with GatedSyncClient(update_interval=args.interval) as client:
+        register(client, recorder, args.handlers, False)
+        recorder.sample(client, 0)
+        client.started.set()
+
+        server.finished.wait()
+        recorder.sample(client, server.tick)
+
+    return client
+
+
+def run_async(server: FakeOrefServer, recorder: Recorder, args) -> AsyncClient:
+    async def main():
+        async with AsyncClient(update_interval=args.interval) as client:
+            await client.initialize()
+            register(client, recorder, args.handlers, True)
+            recorder.sample(client, 0)
+
+            while not server.finished.is_set():
+                await asyncio.sleep(0.05)
+
+            recorder.sample(client, server.tick)
+
+        return client
+
+    return asyncio.run(main())
+
+
+def report(
+    name: str,
+    server: FakeOrefServer,
+    recorder: Recorder,
+    handlers: int,
+    elapsed: float,
+) -> bool:
+    timeline_events = expected_events(server.timeline)
+    ticks = len(server.frames)
+
+    latencies = np.array(
+        [
+            recorder.dispatched_at[tick] - server.served_at[tick]
+            for tick in recorder.dispatched_at
+        ]
+    )
+    percentiles = np.percentile(latencies * 1000, [50, 90, 99, 100])
+
+    new_sirens = sum(len(x.get("on_siren", ())) for x in timeline_events)
+    mismatches = [
+        tick
+        for tick in range(ticks)
+        if recorder.events.get(tick, {}) != timeline_events[tick]
+    ]
+    events = sum(len(x) for x in timeline_events)
+
+    first, last = recorder.memory[0], recorder.memory[-1]
+    growth = (last[1] - first[1]) / 1024**2
+
+    print(f"\n{name}")
+    print(
+        f"  throughput    {ticks / elapsed:,.0f} polls/s, {new_sirens / elapsed:,.0f} new sirens/s"
+    )
+    print(
+        "  latency (ms)  p50 {:.2f}  p90 {:.2f}  p99 {:.2f}  max {:.2f}".format(
+            *percentiles
+        )
+    )
+    print(
+        f"  memory        {first[1] / 1024**2:.1f} MiB -> {last[1] / 1024**2:.1f} MiB ({growth:+.1f} MiB)"
+    )
+    print(f"  city cache    {first[2]:,} -> {last[2]:,} names")
+    for tick, traced, cached in recorder.memory[1:-1]:
+        print(f"    tick {tick:>8,}  {traced / 1024**2:8.1f} MiB  {cached:>8,} names")
+    print(
+        f"  correctness   {ticks - len(mismatches):,}/{ticks:,} ticks match"
+        + (f", first mismatch at tick {mismatches[0]}" if mismatches else "")
+    )
+    print(f"  handlers      {recorder.handler_calls:,}/{events * handlers:,} calls")
+
+    return not mismatches and recorder.handler_calls == events * handlers
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--client", choices=("sync", "async", "both"), default="both")
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--cities", type=int, default=1500)
+    parser.add_argument("--barrage", type=int, default=1000)
+    parser.add_argument("--unknown-rate", type=float, default=0.01)
+    parser.add_argument("--clear-every", type=int, default=20)
+    parser.add_argument("--handlers", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    city_data = create_city_data(args.cities)
+    timeline = create_timeline(
+        city_data,
+        args.ticks,
+        args.barrage,
+        args.unknown_rate,
+        args.clear_every,
+        args.seed,
+    )
+
+    print(
+        f"{args.ticks:,} ticks, {args.cities:,} cities, barrages of {args.barrage:,}, "
+        f"{args.handlers:,} handlers per event"
+    )
+
+    runs = {"sync": run_sync, "async": run_async}
+    names = list(runs) if args.client == "both" else [args.client]
+    passed = True
+
+    for name in names:
+        server = FakeOrefServer(city_data, timeline)
+        recorder = Recorder(server)
+
+        tracemalloc.start()
+        with server.running():
+            start = time.perf_counter()
+            runs[name](server, recorder, args)
+            elapsed = time.perf_counter() - start
+        tracemalloc.stop()
+
+        passed &= report(f"{name} client", server, recorder, args.handlers, elapsed)
+
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,15 @@
 import asyncio
 import pikudhaoref
 
-loop = asyncio.get_event_loop()
-client = pikudhaoref.AsyncClient(update_interval=2, loop=loop)
 
+async def main():
+    # Created inside the running loop, the client polls on it.
+    client = pikudhaoref.AsyncClient(update_interval=2)
 
-@client.event()
-async def on_siren(sirens):
-    print(sirens)
+    @client.event()
+    async def on_siren(sirens):
+        print(sirens)
 
-
-async def run():
     await client.initialize()
     # AsyncClient will do this automatically,
     # but to make sure the city data is usable immediately you should use it.
@@ -18,6 +17,7 @@ async def run():
     print(await client.get_history())
     print(await client.current_sirens())
 
+    await asyncio.Event().wait()
+
 
-loop.run_until_complete(run())
-loop.run_forever()
+asyncio.run(main())
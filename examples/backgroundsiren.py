@@ -0,0 +1,19 @@
+import time
+import pikudhaoref
+
+# Polls on a dedicated event loop thread, so a sync program can use the async client.
+client = pikudhaoref.AsyncClient(update_interval=2, background=True)
+
+
+@client.event()
+async def on_siren(sirens):
+    print(sirens)
+
+
+print(client.run(client.current_sirens()))
+
+try:
+    while True:
+        time.sleep(1)
+finally:
+    client.close()
@@ -0,0 +1,28 @@
+import sys
+
+import pikudhaoref
+
+ADDRESS = "/tmp/pikudhaoref.sock"
+
+if sys.argv[1:] == ["broker"]:
+    # A single process polls the pikudhaoref API and publishes the sirens.
+    client = pikudhaoref.SyncClient(update_interval=2)
+    broker = pikudhaoref.SirenBroker(client, ADDRESS)
+else:
+    # Any number of subscribers receive the same events without polling.
+    client = pikudhaoref.SubscriberClient(ADDRESS)
+    client.wait_until_ready()
+
+    print(client.current_sirens)
+
+    @client.event()
+    def on_siren(sirens):
+        print(f"Siren alert! started sirens: {sirens}")
+
+    @client.event()
+    def on_siren_end(sirens):
+        print(f"Sirens {sirens} have ended.")
+
+
+while True:
+    pass  # To make sure the script doesnt stop
@@ -1,8 +1,14 @@
 from .client import SyncClient, AsyncClient
+from .broker import SirenBroker, SubscriberClient
 from .city import City
-from .enums import HistoryMode
+from .citytable import MappedCityTable, CityView
+from .enums import HistoryMode, OverflowPolicy
+from .localization import LocalizationTable
+from .polygons import AreaPolygons
 from .range import Range
-from .siren import Siren
+from .siren import Siren, ZoneSiren
+from .snapshot import SnapshotStore, FileSnapshotStore, MemorySnapshotStore
+from .stats import SirenStatistics
 from .utils import create_map_url_from_cities
 
 __title__ = "pikudhaoref"
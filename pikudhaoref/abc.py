@@ -1,25 +1,45 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, List, Dict
+from typing import TYPE_CHECKING, Any, List, Dict, Optional, Sequence, Tuple, Union
 import json
+import struct
+import time
+import zlib
 
-from .city import City
+import numpy as np
+
+from .cache import CityCache
+from .city import City, CityZone
+from .citytable import export_city_table
+from .localization import LocalizationTable
+from .matching import CityNameIndex
 from .base import EventManager
-from .exceptions import AccessDenied
+from .exceptions import AccessDenied, InvalidResponse
+from .siren import Siren, ZoneSiren
+from .trace import span
 
 if TYPE_CHECKING:
     from datetime import datetime
 
 __all__ = ("HTTPClient", "Client")
 
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("!BI")
+
 
 class HTTPClient(ABC):
     """
     Represents a HTTP client.
     """
 
-    __slots__ = ("session", "city_data", "proxy")
+    __slots__ = ("session", "city_data", "proxy", "proxies", "timeout", "tracer")
+
+    # Overridable to point the clients at a mirror or a local fake server.
+    CITIES_URL = "https://www.tzevaadom.co.il/static/cities.json"
+    HISTORY_URL = "https://www.oref.org.il//Shared/Ajax/GetAlarmsHistory.aspx"
+    ALERTS_URL = "https://www.oref.org.il/WarningMessages/Alert/alerts.json"
+    REFERER = "https://www.oref.org.il/"
 
     @staticmethod
     def format_datetime(date: datetime) -> str:
@@ -40,6 +60,7 @@ class HTTPClient(ABC):
 
         :param str response: The response.
         :raises: AccessDenied: You cannot access the pikudhaoref API from outside Israel.
+        :raises: InvalidResponse: The response is not empty and is not valid JSON.
         :return: The parsed response.
         :rtype: Optional[Dict]
         """
@@ -49,10 +70,47 @@ class HTTPClient(ABC):
                 "You cannot access the pikudhaoref API from outside Israel."
             )
 
+        response = response.strip("\ufeff \r\n\t")
+        if not response:
+            return {}  # The API returns an empty body when there are no sirens.
+
         try:
             return json.loads(response)
-        except json.decoder.JSONDecodeError:
-            return {}
+        except json.decoder.JSONDecodeError as e:
+            raise InvalidResponse(f"Invalid response: {response[:100]!r}") from e
+
+    @staticmethod
+    def _proxy_list(proxy: Optional[str], proxies: Optional[List[str]]) -> List[str]:
+        """
+        Returns the proxies to rotate through, starting with the proxy.
+
+        :param Optional[str] proxy: The proxy to use first.
+        :param Optional[List[str]] proxies: The other proxies.
+        :return: The proxies.
+        :rtype: List[str]
+        """
+
+        proxies = list(proxies or [])
+        if proxy and proxy not in proxies:
+            proxies.insert(0, proxy)
+
+        return proxies
+
+    def rotate_proxy(self) -> None:
+        """
+        Switches to the next proxy in the proxy list.
+
+        :return: None
+        :rtype: None
+        """
+
+        if len(self.proxies) > 1:
+            try:
+                index = (self.proxies.index(self.proxy) + 1) % len(self.proxies)
+            except ValueError:
+                index = 0  # The proxy was replaced after the client was created.
+
+            self.proxy = self.proxies[index]
 
     def request(self, method: str, url: str, headers: Dict[str, str] = None) -> Any:
         """
@@ -81,7 +139,7 @@ class HTTPClient(ABC):
         cities = list(dictionary["cities"].values())
 
         for city in cities:
-            city.pop("id")
+            city["__id"] = int(city.pop("id"))
             city["area"] = areas[str(city["area"])]
 
         return cities
@@ -144,7 +202,20 @@ class Client(ABC, EventManager):
         "update_interval",
         "_known_sirens",
         "city_cache",
+        "city_index",
+        "zone_events",
+        "_known_zones",
+        "_subscriptions",
+        "health",
+        "snapshot_store",
+        "snapshot_max_age",
+        "statistics",
+        "recent_sirens",
+        "tracer",
+        "polygons",
         "_initialized",
+        "_stale_city_data",
+        "_localization_table",
     )
 
     @staticmethod
@@ -159,13 +230,396 @@ class Client(ABC, EventManager):
 
         return list(dict.fromkeys(list_))  # Nice little cheat
 
+    @staticmethod
+    def _city_key(city: City | str) -> str:
+        return city if isinstance(city, str) else city.name.he
+
+    def _diff_sirens(self, sirens: List[Siren]) -> Tuple[List[Siren], List[Siren]]:
+        """
+        Diffs the current sirens against the known sirens and updates the known sirens.
+
+        :param List[Siren] sirens: The current sirens.
+        :return: The new sirens and the ended sirens.
+        :rtype: Tuple[List[Siren], List[Siren]]
+        """
+
+        known = {self._city_key(siren.city) for siren in self._known_sirens}
+        new_sirens = [
+            siren for siren in sirens if self._city_key(siren.city) not in known
+        ]
+        self._known_sirens.extend(new_sirens)
+
+        ended_sirens = []
+        if not sirens:
+            ended_sirens = self._known_sirens
+            self._known_sirens = []
+
+        return new_sirens, ended_sirens
+
+    def _diff_zones(
+        self, new_sirens: List[Siren], ended_sirens: List[Siren]
+    ) -> Tuple[List[ZoneSiren], List[ZoneSiren]]:
+        """
+        Updates the active zones incrementally from the siren diff.
+
+        :param List[Siren] new_sirens: The new sirens.
+        :param List[Siren] ended_sirens: The ended sirens.
+        :return: The zones which got new sirens and the zones which ended.
+        :rtype: Tuple[List[ZoneSiren], List[ZoneSiren]]
+        """
+
+        changed_zones = {}
+        for siren in new_sirens:
+            zone = getattr(siren.city, "zone", None) or CityZone(*[None] * 5)
+
+            zone_siren = self._known_zones.get(zone.he)
+            if zone_siren is None:
+                zone_siren = self._known_zones[zone.he] = ZoneSiren(zone, [])
+
+            zone_siren.sirens.append(siren)
+            changed_zones[zone.he] = zone_siren
+
+        ended_zones = {}
+        for siren in ended_sirens:
+            zone = getattr(siren.city, "zone", None)
+            zone_key = zone.he if zone else None
+
+            zone_siren = self._known_zones.pop(zone_key, None)
+            if zone_siren is not None:
+                ended_zones[zone_key] = zone_siren
+
+        # Copies, so the delivered zones do not change with later sirens.
+        # Ended zones are no longer tracked and are delivered as they are.
+        return [
+            ZoneSiren(x.zone, list(x.sirens)) for x in changed_zones.values()
+        ], list(ended_zones.values())
+
+    def _poll_failed(self, error: Optional[Exception]) -> List[Tuple[str, Any]]:
+        """
+        Records a failed poll and returns the events that should be called.
+        A failed poll never counts as an empty siren list.
+
+        :param Optional[Exception] error: The error, None if the poll was skipped by the circuit breaker.
+        :return: The event names and their arguments.
+        :rtype: List[Tuple[str, Any]]
+        """
+
+        events = []
+
+        if error is not None:
+            self.health.record_failure()
+            self.http.rotate_proxy()
+            events.append(("on_poll_error", error))
+
+        if self.health.became_stale():
+            events.append(("on_stale", self.health.since_last_success))
+
+        return events
+
+    def _process_sirens(self, sirens: List[Siren]) -> List[Tuple[str, list]]:
+        """
+        Processes the current sirens and returns the events that should be called.
+
+        :param List[Siren] sirens: The current sirens.
+        :return: The event names and their arguments.
+        :rtype: List[Tuple[str, list]]
+        """
+
+        events = []
+
+        with span(self.tracer, "diff", sirens=len(sirens)):
+            new_sirens, ended_sirens = self._diff_sirens(sirens)
+
+        if new_sirens:
+            events.append(("on_siren", new_sirens))
+
+            for siren in new_sirens:
+                self.recent_sirens.add(siren)
+
+            if self.statistics is not None:
+                self.statistics.add_many(new_sirens)
+
+        if ended_sirens:
+            events.append(("on_siren_end", ended_sirens))
+
+        if self.zone_events:
+            new_zones, ended_zones = self._diff_zones(new_sirens, ended_sirens)
+
+            if new_zones:
+                events.append(("on_zone_siren", new_zones))
+
+            if ended_zones:
+                events.append(("on_zone_siren_end", ended_zones))
+
+        return events
+
     def get_city(self, city_name: str) -> City | str:
-        # Get from city cache
-        for city in self.city_cache:
-            if city_name == city or city_name in city.name.languages:
-                return city
+        # Get from city cache, lock free
+        city = self.city_cache.get(city_name)
+        if city is not None:
+            return city
 
         # Create an instance
-        city = City.from_city_name(city_name, self.http.city_data)
-        self.city_cache.append(city)
-        return city
+        city = City.from_city_name(city_name, self.http.city_data, self.city_index)
+
+        # Normalized names are aliases of the cached city, another thread may have won the race.
+        return self.city_cache.add_resolved(city_name, city)
+
+    def _replace_city_cache(self) -> None:
+        # Built aside and swapped in, so lookups never see a half-filled cache.
+        previous = self.city_cache
+        city_cache = CityCache(previous.maxsize, previous.max_aliases)
+        city_cache.add_many(City.from_dict(city) for city in self.http.city_data)
+
+        self.city_index = CityNameIndex(self.http.city_data)
+        self._localization_table = None
+
+        # The counters carry over, so the rates do not restart with the refresh.
+        city_cache.hits = previous.hits
+        city_cache.misses = previous.misses
+        city_cache.unresolved = previous.unresolved
+        city_cache.evictions = previous.evictions
+        self.city_cache = city_cache
+        self._stale_city_data = False
+
+    def _cache_city_data(self) -> None:
+        self.city_index = CityNameIndex(self.http.city_data)
+        self._localization_table = None
+        self.city_cache.add_many(City.from_dict(city) for city in self.http.city_data)
+
+    def get_city_by_id(self, city_id: int) -> Optional[City]:
+        """
+        Returns the city with the id.
+
+        :param int city_id: The city id.
+        :return: The city or None if the id is unknown.
+        :rtype: Optional[City]
+        """
+
+        return self.city_cache.get_by_id(city_id)
+
+    def recent(self, since: datetime = None) -> List[Siren]:
+        """
+        Returns the recent sirens the client detected, without refetching the history.
+
+        :param datetime since: Only return sirens since the datetime.
+        :return: The sirens, in chronological order.
+        :rtype: List[Siren]
+        """
+
+        return self.recent_sirens.recent(since)
+
+    def last_alert(self, city: City | str) -> Optional[Siren]:
+        """
+        Returns the last siren the client detected in the city.
+
+        :param Union[City, str] city: The city or the city name, in any language.
+        :return: The siren or None if the client did not detect a siren in the city.
+        :rtype: Optional[Siren]
+        """
+
+        if isinstance(city, str):
+            city = self.get_city(city)
+
+        return self.recent_sirens.last_alert(self._city_key(city))
+
+    def export_city_table(self, path: str) -> None:
+        """
+        Exports the city data into a memory-mappable table, see MappedCityTable.
+
+        :param str path: The file path.
+        :return: None
+        :rtype: None
+        """
+
+        export_city_table(self.http.city_data, path)
+
+    def localization_table(self) -> LocalizationTable:
+        """
+        Returns a table of the city strings in every language, for rendering siren batches.
+        The table is built once per city data load, so its rendered templates are reused.
+
+        :return: The table.
+        :rtype: LocalizationTable
+        """
+
+        table = self._localization_table
+        if table is None:
+            table = self._localization_table = LocalizationTable(self.http.city_data)
+
+        return table
+
+    def _alerted_areas(self) -> Dict[Any, Siren]:
+        if self.polygons is None:
+            raise RuntimeError(
+                "No alert area polygons, create the client with polygons=AreaPolygons(...)."
+            )
+
+        areas = {}
+        for siren in self._known_sirens:
+            areas[self._city_key(siren.city)] = siren
+            if siren.city_id is not None:
+                areas[siren.city_id] = siren
+
+        return areas
+
+    def alerted_at(self, lat: float, lng: float) -> List[Siren]:
+        """
+        Returns the current sirens whose alert area contains the point.
+
+        :param float lat: The latitude, in degrees.
+        :param float lng: The longitude, in degrees.
+        :raises: RuntimeError: The client was not created with polygons.
+        :return: The sirens.
+        :rtype: List[Siren]
+        """
+
+        return self.alerted_at_many([(lat, lng)])[0]
+
+    def alerted_at_many(
+        self, points: Union[np.ndarray, Sequence[Tuple[float, float]]]
+    ) -> List[List[Siren]]:
+        """
+        Returns the current sirens whose alert area contains each point, in one batched query.
+
+        :param Union[np.ndarray, Sequence[Tuple[float, float]]] points: The latitudes and longitudes, in degrees.
+        :raises: RuntimeError: The client was not created with polygons.
+        :return: The sirens of every point.
+        :rtype: List[List[Siren]]
+        """
+
+        areas = self._alerted_areas()
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        result: List[List[Siren]] = [[] for _ in range(len(points))]
+
+        if areas:
+            point_indices, area_indices = self.polygons.locate(points, areas)
+
+            for point, area in zip(point_indices.tolist(), area_indices.tolist()):
+                siren = areas[self.polygons.keys[area]]
+                if siren not in result[point]:
+                    result[point].append(siren)
+
+        return result
+
+    def dump_trace(self, path: str) -> None:
+        """
+        Writes the recorded polling spans to a Chrome trace JSON file.
+
+        :param str path: The file path.
+        :raises: RuntimeError: The client was not created with trace=True.
+        :return: None
+        :rtype: None
+        """
+
+        if self.tracer is None:
+            raise RuntimeError(
+                "Tracing is disabled, create the client with trace=True."
+            )
+
+        self.tracer.dump(path)
+
+    def snapshot(self) -> bytes:
+        """
+        Returns a compact snapshot of the known sirens and the city cache.
+
+        :return: The snapshot.
+        :rtype: bytes
+        """
+
+        aliases = [
+            [name, city.id]
+            for name, city in self.city_cache.names.items()
+            if city.id is None or name not in city.name.languages
+        ]  # The canonical names are rebuilt from the city data.
+
+        metadata = json.dumps(
+            {
+                "saved_at": time.time(),
+                "city_data": self.http.city_data,
+                "aliases": aliases,
+            },
+            ensure_ascii=False,
+        ).encode()
+
+        return zlib.compress(
+            _SNAPSHOT_HEADER.pack(SNAPSHOT_VERSION, len(metadata))
+            + metadata
+            + Siren.pack_many(self._known_sirens)
+        )
+
+    def restore(self, data: bytes, max_age: float = None) -> None:
+        """
+        Restores the known sirens and the city cache from a snapshot.
+        Sirens that ended while the client was down are reported by the next poll,
+        and the city data is refetched in the background once the client polls.
+        A snapshot older than max_age restores only the city data and the city cache,
+        its sirens may have ended and started again, so the next poll reports them as new.
+
+        :param bytes data: The snapshot.
+        :param float max_age: The maximum age of the known sirens, in seconds, defaults to no limit.
+        :raises: ValueError: The snapshot is invalid or from another version.
+        :return: None
+        :rtype: None
+        """
+
+        try:
+            data = zlib.decompress(data)
+            version, length = _SNAPSHOT_HEADER.unpack_from(data)
+        except (zlib.error, struct.error) as e:
+            raise ValueError("Invalid snapshot.") from e
+
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}.")
+
+        offset = _SNAPSHOT_HEADER.size
+        metadata = json.loads(data[offset : offset + length])
+
+        self.http.city_data = metadata["city_data"]
+        self._cache_city_data()
+
+        for name, city_id in metadata["aliases"]:
+            city = self.city_cache.get_by_id(city_id)
+
+            if city is None:
+                self.get_city(name)
+            else:
+                self.city_cache.add(city, name)
+
+        saved_at = metadata.get("saved_at")
+        if max_age is None or (
+            saved_at is not None and time.time() - saved_at <= max_age
+        ):
+            sirens = Siren.unpack_many(data[offset + length :], self.city_cache.ids)
+        else:
+            sirens = []
+
+        for siren in sirens:
+            if isinstance(siren.city, str):
+                siren.city = self.get_city(siren.city)
+
+        self._known_sirens = sirens
+        self._known_zones = {}
+        self._diff_zones(sirens, [])
+        self._initialized = True
+        # The city data may have changed upstream since it was saved, the poller refetches it.
+        self._stale_city_data = True
+
+    def _restore_snapshot(self) -> bool:
+        if self.snapshot_store is None:
+            return False
+
+        data = self.snapshot_store.load()
+        if data is None:
+            return False
+
+        try:
+            self.restore(data, self.snapshot_max_age)
+        except (ValueError, KeyError):
+            return False  # Start cold instead of failing on a corrupted snapshot.
+
+        return True
+
+    def _save_snapshot(self) -> None:
+        if self.snapshot_store is not None:
+            self.snapshot_store.save(self.snapshot())
@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import socket
+import stat
+import struct
+from threading import Thread, Lock, Event
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from .base import EventManager
+from .cache import CityCache
+from .city import City
+from .matching import CityNameIndex
+from .client import AsyncClient
+from .siren import Siren
+
+if TYPE_CHECKING:
+    from .abc import Client
+
+__all__ = ("SirenBroker", "SubscriberClient")
+
+Address = Union[str, Tuple[str, int]]
+
+_FRAME_HEADER = struct.Struct("!BI")
+
+_HELLO = 0
+_STATE = 1
+_EVENTS = {2: "on_siren", 3: "on_siren_end"}
+_EVENT_KINDS = {name: kind for kind, name in _EVENTS.items()}
+
+
+def _create_socket(address: Address) -> socket.socket:
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    return socket.socket(family, socket.SOCK_STREAM)
+
+
+def _remove_stale_socket(path: str) -> None:
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)  # Nothing listens on it, a previous broker did not clean up.
+    else:
+        probe.close()  # Another broker is listening, bind fails with EADDRINUSE.
+
+
+def _frame(kind: int, data: bytes) -> bytes:
+    return _FRAME_HEADER.pack(kind, len(data)) + data
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+
+        buffer.extend(chunk)
+
+    return bytes(buffer)
+
+
+def _recv_frame(sock: socket.socket) -> Optional[Tuple[int, bytes]]:
+    header = _recv_exact(sock, _FRAME_HEADER.size)
+    if header is None:
+        return None
+
+    kind, length = _FRAME_HEADER.unpack(header)
+    data = _recv_exact(sock, length)
+    return None if data is None else (kind, data)
+
+
+class _Subscriber:
+    """
+    Represents a subscriber connection with a bounded outbox, drained by its own writer thread.
+    A subscriber which stops reading only blocks its writer, never the publisher.
+    """
+
+    __slots__ = ("connection", "closed", "_outbox")
+
+    def __init__(
+        self, connection: socket.socket, outbox_size: int, send_timeout: float
+    ):
+        self.connection = connection
+        self.connection.settimeout(send_timeout)
+        self.closed = False
+
+        self._outbox: queue.Queue[Optional[bytes]] = queue.Queue(outbox_size)
+        Thread(target=self._write, daemon=True).start()
+
+    def send(self, frame: bytes) -> bool:
+        """
+        Queues a frame, without blocking.
+
+        :param bytes frame: The frame.
+        :return: Whether the frame was queued, False if the subscriber is closed or its outbox is full.
+        :rtype: bool
+        """
+
+        if self.closed:
+            return False
+
+        try:
+            self._outbox.put_nowait(frame)
+        except queue.Full:
+            return False
+
+        return True
+
+    def _write(self) -> None:
+        while True:
+            frame = self._outbox.get()
+            if frame is None:
+                return
+
+            try:
+                self.connection.sendall(frame)
+            except OSError:  # Includes the send timeout.
+                self.close()
+                return
+
+    def close(self) -> None:
+        self.closed = True
+        self.connection.close()
+
+        try:
+            self._outbox.put_nowait(None)  # Wakes up the writer.
+        except queue.Full:
+            pass  # The writer fails on the closed connection instead.
+
+
+class SirenBroker:
+    """
+    Publishes the sirens of a single polling client to local subscribers.
+    The broker owns the poller, subscribers only receive the diffed events.
+    Sirens are sent in the compact binary format of Siren.pack_many.
+    Publishing never blocks the poller, subscribers which fall behind are dropped.
+    The state sent to new subscribers is built from the published events, not from the client,
+    so a subscriber never receives a siren in both its state and the next event.
+    """
+
+    __slots__ = (
+        "client",
+        "address",
+        "closed",
+        "outbox_size",
+        "send_timeout",
+        "_server",
+        "_subscribers",
+        "_sirens",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        client: Client,
+        address: Address,
+        outbox_size: int = 64,
+        send_timeout: float = 5,
+    ):
+        """
+        :param Client client: The client which polls the pikudhaoref API.
+        :param Union[str, Tuple[str, int]] address: A unix socket path or a (host, port) tuple.
+        :param int outbox_size: The maximum amount of pending frames per subscriber before it is dropped.
+        :param float send_timeout: The time a subscriber has to accept a frame before it is dropped.
+        """
+
+        self.client = client
+        self.address = address
+        self.closed = False
+        self.outbox_size = outbox_size
+        self.send_timeout = send_timeout
+
+        self._subscribers: List[_Subscriber] = []
+        self._sirens: Dict[str, Siren] = {}
+        self._lock = Lock()
+
+        self._server = _create_socket(address)
+        if isinstance(address, str):
+            _remove_stale_socket(address)
+        else:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        self._server.bind(address)
+        self._server.listen()
+
+        if isinstance(client, AsyncClient):  # Async listeners must be coroutines.
+
+            async def on_siren(sirens):
+                self.publish("on_siren", sirens)
+
+            async def on_siren_end(sirens):
+                self.publish("on_siren_end", sirens)
+
+            client.add_event(on_siren)
+            client.add_event(on_siren_end)
+        else:
+            client.add_event(
+                lambda sirens: self.publish("on_siren", sirens), "on_siren"
+            )
+            client.add_event(
+                lambda sirens: self.publish("on_siren_end", sirens), "on_siren_end"
+            )
+
+        # After the listeners, sirens published since then are not added twice.
+        with self._lock:
+            for siren in client._known_sirens:
+                self._sirens.setdefault(client._city_key(siren.city), siren)
+
+        Thread(target=self._accept_connections, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def _accept_connections(self) -> None:
+        while not self.closed:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                return
+
+            city_data = _frame(
+                _HELLO,
+                json.dumps(self.client.http.city_data, ensure_ascii=False).encode(),
+            )
+            subscriber = _Subscriber(connection, self.outbox_size, self.send_timeout)
+
+            # Under the lock, so no event is published between the state and the subscription.
+            with self._lock:
+                state = _frame(_STATE, Siren.pack_many(list(self._sirens.values())))
+
+                if subscriber.send(city_data) and subscriber.send(state):
+                    self._subscribers.append(subscriber)
+                else:
+                    subscriber.close()
+
+    def publish(self, name: str, sirens: List[Siren]) -> None:
+        """
+        Queues an event for every connected subscriber, without blocking.
+        Subscribers which disconnected or fell behind are dropped.
+
+        :param str name: The event name.
+        :param List[Siren] sirens: The sirens.
+        :return: None
+        :rtype: None
+        """
+
+        frame = _frame(_EVENT_KINDS[name], Siren.pack_many(sirens))
+
+        with self._lock:
+            for siren in sirens:
+                key = self.client._city_key(siren.city)
+
+                if name == "on_siren":
+                    self._sirens[key] = siren
+                else:
+                    self._sirens.pop(key, None)
+
+            for subscriber in list(self._subscribers):
+                if not subscriber.send(frame):
+                    subscriber.close()
+                    self._subscribers.remove(subscriber)
+
+    def close(self) -> None:
+        """
+        Closes the broker and every subscriber connection.
+
+        :return: None
+        :rtype: None
+        """
+
+        self.closed = True
+        self._server.close()
+
+        if isinstance(self.address, str):
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.close()
+
+            self._subscribers = []
+
+
+class SubscriberClient(EventManager):
+    """
+    Represents a lightweight client which receives sirens from a SirenBroker.
+    It does not poll the pikudhaoref API nor download the city data.
+    """
+
+    __slots__ = (
+        "address",
+        "closed",
+        "city_data",
+        "city_cache",
+        "city_index",
+        "_known_sirens",
+        "_socket",
+        "_ready",
+    )
+
+    def __init__(self, address: Address):
+        """
+        :param Union[str, Tuple[str, int]] address: The address of the broker.
+        """
+
+        super().__init__()
+
+        self.address = address
+        self.closed = False
+        self.city_data = []
+        self.city_cache = CityCache()
+        self.city_index = None
+
+        self._known_sirens: List[Siren] = []
+        self._ready = Event()
+
+        self._socket = _create_socket(address)
+        self._socket.connect(address)
+
+        Thread(target=self._handle_messages, daemon=True).start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """
+        Waits until the broker has sent the city data and the current sirens.
+
+        :param float timeout: The timeout in seconds.
+        :return: Whether the subscriber is ready.
+        :rtype: bool
+        """
+
+        return self._ready.wait(timeout)
+
+    @property
+    def current_sirens(self) -> List[Siren]:
+        return list(self._known_sirens)
+
+    def get_city(self, city_name: str) -> Union[City, str]:
+        city = self.city_cache.get(city_name)
+
+        if city is None:
+            city = City.from_city_name(city_name, self.city_data, self.city_index)
+            city = self.city_cache.add_resolved(city_name, city)
+
+        return city
+
+    def _decode_sirens(self, data: bytes) -> List[Siren]:
+        sirens = Siren.unpack_many(data, self.city_cache.ids)
+
+        for siren in sirens:
+            if isinstance(siren.city, str):  # Cities which are not in the city data.
+                siren.city = self.get_city(siren.city)
+
+        return sirens
+
+    def _handle_messages(self) -> None:
+        while not self.closed:
+            try:
+                frame = _recv_frame(self._socket)
+            except OSError:
+                frame = None
+
+            if frame is None:
+                self.closed = True
+                break
+
+            kind, data = frame
+
+            if kind == _HELLO:
+                self.city_data = json.loads(data)
+                self.city_index = CityNameIndex(self.city_data)
+                self.city_cache.add_many(
+                    City.from_dict(city) for city in self.city_data
+                )
+            elif kind == _STATE:
+                self._known_sirens = self._decode_sirens(data)
+                self._ready.set()
+            else:
+                name = _EVENTS[kind]
+                sirens = self._decode_sirens(data)
+
+                if name == "on_siren":
+                    self._known_sirens.extend(sirens)
+                else:
+                    self._known_sirens = []
+
+                self.call_sync_event(name, sirens)
+
+    def close(self) -> None:
+        """
+        Closes the connection to the broker.
+
+        :return: None
+        :rtype: None
+        """
+
+        self.closed = True
+        self._socket.close()
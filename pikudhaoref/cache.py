@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .city import City
+
+__all__ = ("CityCache",)
+
+
+class CityCache:
+    """
+    Represents a concurrency safe city cache.
+
+    The canonical names of cities from the city data live in an immutable snapshot,
+    lookups read it without a lock and writes copy the snapshot and swap it atomically.
+    Aliases of cities from the city data, such as fuzzy matches, live in a second lock-free
+    snapshot of up to max_aliases names.
+    Placeholders for unknown cities and the aliases past max_aliases live in a size-bounded LRU,
+    so that they cannot grow the cache without limit.
+    """
+
+    __slots__ = (
+        "maxsize",
+        "max_aliases",
+        "hits",
+        "misses",
+        "unresolved",
+        "evictions",
+        "_names",
+        "_ids",
+        "_aliases",
+        "_extra",
+        "_lock",
+    )
+
+    def __init__(self, maxsize: int = 1024, max_aliases: int = 1024):
+        """
+        :param int maxsize: The maximum amount of names to keep in the LRU.
+        :param int max_aliases: The maximum amount of aliases to keep in the lock-free snapshot.
+        """
+
+        self.maxsize = maxsize
+        self.max_aliases = max_aliases
+        self.hits = 0
+        self.misses = 0
+        self.unresolved = 0  # Lookups which returned a placeholder.
+        self.evictions = 0
+
+        self._names: Dict[str, City] = {}
+        self._ids: Dict[int, City] = {}
+        self._aliases: Dict[str, City] = {}
+        self._extra: OrderedDict[str, City] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[City]:
+        return iter(self._ids.values())
+
+    @property
+    def ids(self) -> Mapping[int, City]:
+        """
+        A read-only snapshot of the city id to city table.
+        """
+
+        return MappingProxyType(self._ids)
+
+    @property
+    def names(self) -> Mapping[str, City]:
+        """
+        A read-only snapshot of the city name to city table, including the non-canonical names.
+        """
+
+        with self._lock:
+            return MappingProxyType({**self._extra, **self._aliases, **self._names})
+
+    @property
+    def unresolved_rate(self) -> float:
+        """
+        The share of lookups which returned a placeholder for an unknown city.
+        """
+
+        lookups = self.hits + self.misses
+        return self.unresolved / lookups if lookups else 0.0
+
+    def get(self, city_name: str) -> Optional[City]:
+        """
+        Returns the cached city with the name.
+
+        :param str city_name: The city name, in any language.
+        :return: The city or None if the city is not cached.
+        :rtype: Optional[City]
+        """
+
+        city = self._names.get(city_name) or self._aliases.get(city_name)
+        if city is not None:
+            self.hits += 1
+            return city
+
+        with self._lock:
+            city = self._extra.get(city_name)
+            if city is None:
+                self.misses += 1
+                return None
+
+            self._extra.move_to_end(city_name)
+            self.hits += 1
+            if city.id is None:
+                self.unresolved += 1
+
+        return city
+
+    def get_by_id(self, city_id: int) -> Optional[City]:
+        """
+        Returns the cached city with the id.
+
+        :param int city_id: The city id.
+        :return: The city or None if the city is not cached.
+        :rtype: Optional[City]
+        """
+
+        return self._ids.get(city_id)
+
+    def add_resolved(self, city_name: str, city: City) -> City:
+        """
+        Adds the city resolved for a name which get missed, as part of the same lookup.
+        A city with an id is added as an alias of the cached city with that id.
+
+        :param str city_name: The name which get missed.
+        :param City city: The city resolved from the city data or a placeholder.
+        :return: The cached city, which is another city if another thread resolved the name first.
+        :rtype: City
+        """
+
+        with self._lock:
+            cached = (
+                self._names.get(city_name)
+                or self._aliases.get(city_name)
+                or self._extra.get(city_name)
+            )
+
+            if cached is None:
+                cached = self._ids.get(city.id, city)
+                self._add_many([cached], (city_name,))
+
+            if cached.id is None:
+                self.unresolved += 1
+
+        return cached
+
+    def add(self, city: City, *aliases: str) -> None:
+        """
+        Adds the city to the cache under all of its names and the aliases.
+
+        :param City city: The city.
+        :param str aliases: Additional names the city should be found by.
+        :return: None
+        :rtype: None
+        """
+
+        self.add_many([city], aliases)
+
+    def add_many(self, cities: Iterable[City], aliases: Iterable[str] = ()) -> None:
+        """
+        Adds the cities to the cache in a single write.
+        Cities with an id are added under their names to the canonical snapshot
+        and under the aliases to the alias snapshot, placeholders are added to the LRU.
+
+        :param Iterable[City] cities: The cities.
+        :param Iterable[str] aliases: Additional names the cities should be found by.
+        :return: None
+        :rtype: None
+        """
+
+        aliases = tuple(aliases)
+
+        with self._lock:
+            self._add_many(cities, aliases)
+
+    def _add_many(self, cities: Iterable[City], aliases: Tuple[str, ...]) -> None:
+        names = None
+        ids = None
+        alias_names = None
+
+        for city in cities:
+            if city.id is None:
+                for name in (*city.name.languages, *aliases):
+                    if name is not None:
+                        self._add_extra(name, city)
+
+                continue
+
+            if city.id not in (self._ids if ids is None else ids):
+                if names is None:
+                    names, ids = dict(self._names), dict(self._ids)
+
+                for name in city.name.languages:
+                    if name is not None:
+                        names.setdefault(name, city)
+
+                ids[city.id] = city
+
+            for name in aliases:
+                if name in (self._names if names is None else names):
+                    continue
+
+                current = self._aliases if alias_names is None else alias_names
+                if name in current:
+                    continue
+
+                if len(current) < self.max_aliases:
+                    if alias_names is None:
+                        alias_names = dict(self._aliases)
+
+                    alias_names[name] = city
+                else:
+                    self._add_extra(name, city)
+
+        # Publish the new snapshots, readers see either the old or the new one.
+        if names is not None:
+            self._ids = ids
+            self._names = names
+
+        if alias_names is not None:
+            self._aliases = alias_names
+
+    def _add_extra(self, name: str, city: City) -> None:
+        if name in self._extra:
+            self._extra.move_to_end(name)
+            return
+
+        self._extra[name] = city
+        if len(self._extra) > self.maxsize:
+            self._extra.popitem(last=False)
+            self.evictions += 1
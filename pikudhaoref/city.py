@@ -1,17 +1,87 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Any, List, Union, Optional
+from typing import Dict, Any, List, Tuple, Union, Optional, TYPE_CHECKING
 
 from .enums import MatchMode
-
-__all__ = ("LanguageRepresentation", "CityName", "CityZone", "CityCountdown", "City")
-
-
-@dataclass
+from .matching import normalize_city_name
+
+if TYPE_CHECKING:
+    from .matching import CityNameIndex
+
+__all__ = (
+    "LANGUAGES",
+    "COUNTDOWN_TRANSLATIONS",
+    "LanguageRepresentation",
+    "CityName",
+    "CityZone",
+    "CityCountdown",
+    "City",
+)
+
+LANGUAGES = ("he", "en", "ru", "ar", "es")
+
+COUNTDOWN_TRANSLATIONS: Dict[int, Dict[str, str]] = {
+    0: {
+        "he": "מיידי",
+        "en": "Immediately",
+        "ru": "Срочно",
+        "ar": "فوري",
+        "es": "Inmediatamente",
+    },
+    15: {
+        "he": "15 שניות",
+        "en": "15 Seconds",
+        "ru": "15 секунд",
+        "ar": "15 ثانية",
+        "es": "15 Segundos",
+    },
+    30: {
+        "he": "30 שניות",
+        "en": "30 Seconds",
+        "ru": "30 секунд",
+        "ar": "30 ثانية",
+        "es": "30 Segundos",
+    },
+    45: {
+        "he": "45 שניות",
+        "en": "45 Seconds",
+        "ru": "45 секунд",
+        "ar": "45 ثانية",
+        "es": "45 Segundos",
+    },
+    60: {
+        "he": "דקה",
+        "en": "One minute",
+        "ru": "Минута",
+        "ar": "دقيقة",
+        "es": "Un minuto",
+    },
+    90: {
+        "he": "דקה וחצי",
+        "en": "One and a half minutes",
+        "ru": "1.5 минуты",
+        "ar": "دقيقة ونصف",
+        "es": "Un minuto y medio",
+    },
+    180: {
+        "he": "3 דקות",
+        "en": "3 minutes",
+        "ru": "3 минуты",
+        "ar": "3 دقائق",
+        "es": "3 minuto",
+    },
+}
+
+# Countdowns are shared between cities, so from_seconds creates one per value.
+_countdowns: Dict[int, CityCountdown] = {}
+
+
+@dataclass(frozen=True)
 class LanguageRepresentation:
     """
     Represents a class which adds language representations and language attributes to another class.
+    Instances are immutable, countdowns are shared between cities.
     Meant to be inherited.
     """
 
@@ -25,8 +95,8 @@ class LanguageRepresentation:
         return self.en
 
     @property
-    def languages(self) -> List[str]:
-        return [self.he, self.en, self.ru, self.ar, self.es]
+    def languages(self) -> Tuple[Optional[str], ...]:
+        return self.he, self.en, self.ru, self.ar, self.es
 
 
 class CityName(LanguageRepresentation):
@@ -41,7 +111,7 @@ class CityZone(LanguageRepresentation):
     """
 
 
-@dataclass
+@dataclass(frozen=True)
 class CityCountdown(LanguageRepresentation):
     """
     Represents a city countdown.
@@ -51,59 +121,22 @@ class CityCountdown(LanguageRepresentation):
 
     @classmethod
     def from_seconds(cls, seconds: int) -> CityCountdown:
-        countdown_dict = {
-            0: {
-                "he": "מיידי",
-                "en": "Immediately",
-                "ru": "Срочно",
-                "ar": "فوري",
-                "es": "Inmediatamente",
-            },
-            15: {
-                "he": "15 שניות",
-                "en": "15 Seconds",
-                "ru": "15 секунд",
-                "ar": "15 ثانية",
-                "es": "15 Segundos",
-            },
-            30: {
-                "he": "30 שניות",
-                "en": "30 Seconds",
-                "ru": "30 секунд",
-                "ar": "30 ثانية",
-                "es": "30 Segundos",
-            },
-            45: {
-                "he": "45 שניות",
-                "en": "45 Seconds",
-                "ru": "45 секунд",
-                "ar": "45 ثانية",
-                "es": "45 Segundos",
-            },
-            60: {
-                "he": "דקה",
-                "en": "One minute",
-                "ru": "Минута",
-                "ar": "دقيقة",
-                "es": "Un minuto",
-            },
-            90: {
-                "he": "דקה וחצי",
-                "en": "One and a half minutes",
-                "ru": "1.5 минуты",
-                "ar": "دقيقة ونصف",
-                "es": "Un minuto y medio",
-            },
-            180: {
-                "he": "3 דקות",
-                "en": "3 minutes",
-                "ru": "3 минуты",
-                "ar": "3 دقائق",
-                "es": "3 minuto",
-            },
-        }
-
-        return cls(**countdown_dict.get(seconds), seconds=seconds)
+        """
+        Returns the countdown of the seconds, instances are cached and shared.
+
+        :param int seconds: The countdown in seconds.
+        :raises: KeyError: The countdown has no translations.
+        :return: The countdown.
+        :rtype: CityCountdown
+        """
+
+        countdown = _countdowns.get(seconds)
+
+        if countdown is None:
+            countdown = cls(**COUNTDOWN_TRANSLATIONS[seconds], seconds=seconds)
+            _countdowns[seconds] = countdown
+
+        return countdown
 
 
 @dataclass
@@ -117,6 +150,7 @@ class City:
     countdown: CityCountdown
     lat: float
     lng: float
+    id: Optional[int] = None
 
     @staticmethod
     def _city_name_match(
@@ -126,12 +160,17 @@ class City:
         city_names = [name for key, name in city_data.items() if key in city_keys]
 
         for api_city_name in city_names:
-            matches = {
-                MatchMode.EXACT: city_name == api_city_name,
-                MatchMode.IN: city_name in api_city_name,
-            }
-
-            match = matches.get(match_mode)
+            if match_mode == MatchMode.FUZZY:
+                match = normalize_city_name(city_name) == normalize_city_name(
+                    api_city_name
+                )
+            else:
+                matches = {
+                    MatchMode.EXACT: city_name == api_city_name,
+                    MatchMode.IN: city_name in api_city_name,
+                }
+
+                match = matches.get(match_mode)
 
             if match:
                 return True
@@ -140,7 +179,10 @@ class City:
 
     @classmethod
     def from_city_name(
-        cls, city_name: str, city_data: List[Dict[str, Any]]
+        cls,
+        city_name: str,
+        city_data: List[Dict[str, Any]],
+        index: Optional[CityNameIndex] = None,
     ) -> Union[City, str]:
         """
         Returns a CityInformation object from a city name.
@@ -148,10 +190,23 @@ class City:
 
         :param List[Dict[str, Any]] city_data: The city data to get the city from.
         :param str city_name: The city name.
+        :param Optional[CityNameIndex] index: A precomputed index of the city data, used for fast exact, substring and normalized matching.
         :return: The city or the city_name (str) if the city cannot be found (old cities).
         :rtype: Union[City, str]
         """
 
+        if index is not None:
+            # Like MatchMode.FUZZY below, names only match after normalization, never by edit distance.
+            city_dict = (
+                index.exact(city_name)
+                or index.contains(city_name)
+                or index.normalized(city_name)
+            )
+
+            return (
+                cls.from_dict(city_dict) if city_dict else cls._placeholder(city_name)
+            )
+
         city_dict = next(
             (
                 city
@@ -176,13 +231,18 @@ class City:
             if city_dict:
                 return cls.from_dict(city_dict)
 
+        # In case the city name is not in the city list.
+        return cls._placeholder(city_name)
+
+    @classmethod
+    def _placeholder(cls, city_name: str) -> City:
         return cls(
             name=CityName(city_name, None, None, None, None),
             zone=CityZone(None, None, None, None, None),
             countdown=CityCountdown.from_seconds(0),
             lat=0,
             lng=0,
-        )  # In case the city name is not in the city list.
+        )
 
     @classmethod
     def from_dict(cls, dictionary: Dict[str, Any]) -> City:
@@ -205,5 +265,6 @@ class City:
             CityName(*city_values),
             CityZone(*zone_dict.values()),
             CityCountdown.from_seconds(countdown_seconds),
-            *values[7:]
+            *values[7:],
+            id=dictionary.get("__id"),
         )
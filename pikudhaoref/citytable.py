@@ -0,0 +1,306 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .city import LANGUAGES, City, CityName, CityZone, CityCountdown
+
+__all__ = ("export_city_table", "MappedCityTable", "CityView")
+
+_MAGIC = b"PHCT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHII")
+_NO_STRING = 0xFFFFFFFF
+
+# Column name, dtype, whether the column has rows per city or per zone, and values per row.
+_COLUMNS = (
+    ("id", "<i4", "city", 1),
+    ("lat", "<f8", "city", 1),
+    ("lng", "<f8", "city", 1),
+    ("countdown", "<i2", "city", 1),
+    ("zone", "<i4", "city", 1),
+    ("name_offsets", "<u4", "city", 5),
+    ("name_lengths", "<u4", "city", 5),
+    ("zone_offsets", "<u4", "zone", 5),
+    ("zone_lengths", "<u4", "zone", 5),
+)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _layout(
+    cities: int, zones: int
+) -> Tuple[Dict[str, Tuple[int, np.dtype, int]], int]:
+    layout = {}
+    offset = _align(_HEADER.size)
+
+    for name, dtype, scope, width in _COLUMNS:
+        dtype = np.dtype(dtype)
+        count = (cities if scope == "city" else zones) * width
+
+        layout[name] = (offset, dtype, count)
+        offset = _align(offset + dtype.itemsize * count)
+
+    return layout, offset  # The string pool starts after the columns.
+
+
+def export_city_table(city_data: List[Dict[str, Any]], path: str) -> None:
+    """
+    Exports the city data into a read-only binary table which can be memory-mapped by many processes.
+    The file is replaced atomically, tables mapped before the export keep reading the previous file.
+    The table has fixed-width columns for the numeric fields and an offset-indexed string pool for the names.
+
+    :param List[Dict[str, Any]] city_data: The city data.
+    :param str path: The file path.
+    :return: None
+    :rtype: None
+    """
+
+    cities = sorted(city_data, key=lambda x: x["__id"])  # Sorted for binary search.
+
+    zone_ids: Dict[str, int] = {}
+    zones: List[Dict[str, Any]] = []
+    for city in cities:
+        if city["area"]["he"] not in zone_ids:
+            zone_ids[city["area"]["he"]] = len(zones)
+            zones.append(city["area"])
+
+    pool = bytearray()
+    strings: Dict[str, Tuple[int, int]] = {}
+
+    def add_strings(names: List[Optional[str]]) -> Tuple[List[int], List[int]]:
+        offsets, lengths = [], []
+
+        for name in names:
+            if name is None:
+                offsets.append(_NO_STRING)
+                lengths.append(0)
+                continue
+
+            if name not in strings:
+                encoded = name.encode()
+                strings[name] = (len(pool), len(encoded))
+                pool.extend(encoded)
+
+            offset, length = strings[name]
+            offsets.append(offset)
+            lengths.append(length)
+
+        return offsets, lengths
+
+    name_offsets, name_lengths = add_strings(
+        [city.get(language) for city in cities for language in LANGUAGES]
+    )
+    zone_offsets, zone_lengths = add_strings(
+        [zone.get(language) for zone in zones for language in LANGUAGES]
+    )
+
+    columns = {
+        "id": [city["__id"] for city in cities],
+        "lat": [city["lat"] for city in cities],
+        "lng": [city["lng"] for city in cities],
+        "countdown": [city["countdown"] for city in cities],
+        "zone": [zone_ids[city["area"]["he"]] for city in cities],
+        "name_offsets": name_offsets,
+        "name_lengths": name_lengths,
+        "zone_offsets": zone_offsets,
+        "zone_lengths": zone_lengths,
+    }
+
+    layout, pool_offset = _layout(len(cities), len(zones))
+    buffer = bytearray(pool_offset + len(pool))
+
+    _HEADER.pack_into(buffer, 0, _MAGIC, _VERSION, len(cities), len(zones))
+    for name, (offset, dtype, count) in layout.items():
+        array = np.asarray(columns[name], dtype=dtype)
+        buffer[offset : offset + dtype.itemsize * count] = array.tobytes()
+
+    buffer[pool_offset:] = pool
+
+    # Replace the file instead of truncating it, processes may have it memory-mapped.
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(temporary_path, "wb") as f:
+        f.write(buffer)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temporary_path, path)
+
+
+class MappedCityTable:
+    """
+    Represents a memory-mapped city table created by export_city_table.
+    The columns are zero-copy views of the mapping, so processes mapping the same file share its pages.
+    """
+
+    __slots__ = (
+        "path",
+        "columns",
+        "_file",
+        "_mmap",
+        "_pool_offset",
+        "_cities",
+        "_zones",
+    )
+
+    def __init__(self, path: str):
+        """
+        :param str path: The file path.
+        :raises: ValueError: The file is not a city table.
+        """
+
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self._cities, self._zones = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {_VERSION} city table.")
+
+        layout, self._pool_offset = _layout(self._cities, self._zones)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.frombuffer(self._mmap, dtype, count, offset)
+            for name, (offset, dtype, count) in layout.items()
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._cities
+
+    def __getitem__(self, index: int) -> CityView:
+        if not -self._cities <= index < self._cities:
+            raise IndexError("City index out of range.")
+
+        return CityView(self, index % self._cities)
+
+    def __iter__(self):
+        return (CityView(self, index) for index in range(self._cities))
+
+    def get_by_id(self, city_id: int) -> Optional[CityView]:
+        """
+        Returns the city with the id, with a binary search over the id column.
+
+        :param int city_id: The city id.
+        :return: The city or None if the id is not in the table.
+        :rtype: Optional[CityView]
+        """
+
+        ids = self.columns["id"]
+        index = int(np.searchsorted(ids, city_id))
+
+        if index < self._cities and ids[index] == city_id:
+            return CityView(self, index)
+
+        return None
+
+    def string(self, offset: int, length: int) -> Optional[str]:
+        """
+        Returns a string from the string pool.
+
+        :param int offset: The offset in the string pool.
+        :param int length: The length in bytes.
+        :return: The string or None if the string is missing.
+        :rtype: Optional[str]
+        """
+
+        if offset == _NO_STRING:
+            return None
+
+        start = self._pool_offset + int(offset)
+        return self._mmap[start : start + int(length)].decode()
+
+    def _strings(self, column: str, index: int) -> List[Optional[str]]:
+        offsets = self.columns[f"{column}_offsets"][index * 5 : index * 5 + 5]
+        lengths = self.columns[f"{column}_lengths"][index * 5 : index * 5 + 5]
+
+        return [self.string(*x) for x in zip(offsets, lengths)]
+
+    def close(self) -> None:
+        """
+        Closes the mapping. Views created from the table must not be used afterwards.
+
+        :return: None
+        :rtype: None
+        """
+
+        self.columns = {}
+        self._mmap.close()
+        self._file.close()
+
+
+class CityView:
+    """
+    Represents a city of a MappedCityTable.
+    The attributes of City are read lazily from the mapping.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: MappedCityTable, index: int):
+        self.table = table
+        self.index = index
+
+    def __repr__(self):
+        return f"<CityView id={self.id} name={self.name.en!r}>"
+
+    def __eq__(self, other):
+        if isinstance(other, CityView):
+            return self.table is other.table and self.index == other.index
+
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self.table), self.index))
+
+    @property
+    def id(self) -> int:
+        return int(self.table.columns["id"][self.index])
+
+    @property
+    def lat(self) -> float:
+        return float(self.table.columns["lat"][self.index])
+
+    @property
+    def lng(self) -> float:
+        return float(self.table.columns["lng"][self.index])
+
+    @property
+    def zone_id(self) -> int:
+        return int(self.table.columns["zone"][self.index])
+
+    @property
+    def name(self) -> CityName:
+        return CityName(*self.table._strings("name", self.index))
+
+    @property
+    def zone(self) -> CityZone:
+        return CityZone(*self.table._strings("zone", self.zone_id))
+
+    @property
+    def countdown(self) -> CityCountdown:
+        return CityCountdown.from_seconds(
+            int(self.table.columns["countdown"][self.index])
+        )
+
+    def to_city(self) -> City:
+        """
+        Returns a City with the values of the view.
+
+        :return: The city.
+        :rtype: City
+        """
+
+        return City(self.name, self.zone, self.countdown, self.lat, self.lng, self.id)
@@ -2,15 +2,24 @@ from __future__ import annotations
 
 import asyncio
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 from io import BytesIO
 from threading import Thread
-from typing import Union, List, TYPE_CHECKING
+from typing import Any, Coroutine, Optional, Union, List, Tuple, TYPE_CHECKING
 
 from .abc import Client
-from .enums import HistoryMode
+from .cache import CityCache
+from .enums import HistoryMode, OverflowPolicy
 from .http import SyncHTTPClient, AsyncHTTPClient
+from .polygons import AreaPolygons
+from .recent import RecentSirens
+from .resilience import PollerHealth
+from .runtime import LoopThread, new_event_loop, running_loop
 from .siren import Siren
+from .snapshot import SnapshotStore
+from .stats import SirenStatistics
+from .subscription import SyncSirenSubscription, AsyncSirenSubscription
+from .trace import Tracer, span
 
 if TYPE_CHECKING:
     from .city import City
@@ -26,28 +35,65 @@ class SyncClient(Client):
 
     __slots__ = ()
 
-    def __init__(self, update_interval: Union[int, float] = 2, proxy: str = None):
+    def __init__(
+        self,
+        update_interval: Union[int, float] = 2,
+        proxy: str = None,
+        zone_events: bool = False,
+        proxies: List[str] = None,
+        stale_after: float = 30,
+        snapshot_store: SnapshotStore = None,
+        snapshot_max_age: float = 60,
+        statistics: SirenStatistics = None,
+        recent_window: timedelta = timedelta(hours=1),
+        trace: bool = False,
+        polygons: AreaPolygons = None,
+    ):
         """
         :param Union[int, float] update_interval: The update interval of the client.
+        :param bool zone_events: Whether to call the on_zone_siren and on_zone_siren_end events.
+        :param List[str] proxies: Proxies to rotate through when a poll fails.
+        :param float stale_after: The time without a successful poll after which on_stale is called.
+        :param SnapshotStore snapshot_store: A store to checkpoint the known sirens and the city cache to, the client warm-starts from it.
+        :param float snapshot_max_age: The age in seconds after which a snapshot restores only the city cache and not the known sirens.
+        :param SirenStatistics statistics: Rollups to update with every new siren.
+        :param timedelta recent_window: How long detected sirens are kept for the recent and last_alert methods.
+        :param bool trace: Whether to record a trace of every poll, see dump_trace.
+        :param AreaPolygons polygons: The alert area polygons, see alerted_at.
         """
 
         super().__init__()
 
         self.update_interval = update_interval
-        self.http = SyncHTTPClient(proxy=proxy)
+        self.tracer = Tracer() if trace else None
+        self.http = SyncHTTPClient(
+            proxy=proxy, proxies=proxies, initialize=False, tracer=self.tracer
+        )
+        self.health = PollerHealth(stale_after)
 
         self._initialized = False
+        self._stale_city_data = False
+        self._localization_table = None
         self.closed = False
         self._known_sirens = []
-        self.city_cache = []
+        self.city_cache = CityCache()
+        self.city_index = None
+        self.zone_events = zone_events
+        self._known_zones = {}
+        self._subscriptions = []
+        self.snapshot_store = snapshot_store
+        self.snapshot_max_age = snapshot_max_age
+        self.statistics = statistics
+        self.recent_sirens = RecentSirens(recent_window)
+        self.polygons = polygons
 
         self.initialize()
         Thread(target=self._handle_sirens, daemon=True).start()
 
     def initialize(self):
-        if not self._initialized:
-            for city in self.http.city_data:
-                self.city_cache.append(self.get_city(city["he"]))
+        if not self._initialized and not self._restore_snapshot():
+            self.http.initialize_city_data()
+            self._cache_city_data()
 
             self._initialized = True
 
@@ -58,6 +104,29 @@ class SyncClient(Client):
         self.closed = True
         self.http.session.close()
 
+        for subscription in list(self._subscriptions):
+            subscription.close()
+
+    def sirens(
+        self,
+        event: str = "on_siren",
+        maxsize: int = 64,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> SyncSirenSubscription:
+        """
+        Subscribes to the batches of an event.
+        Each subscription has its own bounded queue, iterate it to consume the batches.
+
+        :param str event: The event name.
+        :param int maxsize: The maximum amount of pending batches.
+        :param OverflowPolicy policy: What to do when the consumer falls behind.
+        :raises: ValueError: maxsize is less than 1.
+        :return: The subscription.
+        :rtype: SyncSirenSubscription
+        """
+
+        return SyncSirenSubscription(self._subscriptions, event, maxsize, policy)
+
     def get_history(
         self,
         mode: HistoryMode = HistoryMode.TODAY,
@@ -69,48 +138,65 @@ class SyncClient(Client):
         else:
             sirens = self.http.get_history(mode.value)
 
-        if get_city:
-            for siren in sirens:
-                siren["data"] = self.get_city(siren["data"])
-
-        return [Siren.from_raw(x) for x in sirens]
+        return Siren.from_raw_many(sirens, self.get_city if get_city else None)
 
     def create_map(self, cities: List[City], key: str = None) -> BytesIO:
         return self.http.create_map(cities, key)
 
     @property
     def current_sirens(self) -> List[Siren]:
-        return [
-            Siren(self.get_city(x), datetime.utcnow())
-            for x in self.remove_duplicates(self.http.get_current_sirens())
-        ]
+        city_names = self.remove_duplicates(self.http.get_current_sirens())
+
+        with span(self.tracer, "resolve_cities", cities=len(city_names)):
+            return [Siren(self.get_city(x), datetime.utcnow()) for x in city_names]
+
+    def _poll(self) -> List[Tuple[str, Any]]:
+        if not self.health.circuit_breaker.allow_request():
+            return self._poll_failed(None)
+
+        try:
+            sirens = self.current_sirens
+        except Exception as e:
+            return self._poll_failed(e)
+
+        self.health.record_success()
+        return self._process_sirens(sirens)
+
+    def _refresh_city_data(self) -> None:
+        try:
+            self.http.initialize_city_data()
+        except Exception:
+            return  # Keep the restored city data, it is refreshed on the next start.
+
+        self._replace_city_cache()
 
     def _handle_sirens(self):
         self.initialize()
 
+        if self._stale_city_data:
+            Thread(target=self._refresh_city_data, daemon=True).start()
+
         while not self.closed:
-            time.sleep(self.update_interval)
-            sirens = self.current_sirens
+            time.sleep(self.health.next_delay(self.update_interval))
+
+            with span(self.tracer, "poll"):
+                events = self._poll()
 
-            new_sirens = [
-                siren
-                for siren in sirens
-                if siren.city not in [siren.city for siren in self._known_sirens]
-            ]
-            if new_sirens:
-                self._known_sirens.extend(new_sirens)
-                self.call_sync_event("on_siren", new_sirens)
+                for name, argument in events:
+                    with span(self.tracer, "call_sync_event", event=name):
+                        self.call_sync_event(name, argument)
 
-            if not sirens:
-                ended_sirens = [
-                    x
-                    for x in self._known_sirens
-                    if x.city not in [siren.city for siren in sirens]
-                ]
-                if ended_sirens:
-                    self.call_sync_event("on_siren_end", ended_sirens)
+                    for subscription in list(self._subscriptions):
+                        if subscription.event == name:
+                            try:
+                                subscription.put(argument)
+                            except Exception:
+                                # A broken subscription must not stop the poller.
+                                subscription.close()
 
-                self._known_sirens = []
+                # After the events, so the checkpoint does not delay them.
+                if any(name in ("on_siren", "on_siren_end") for name, _ in events):
+                    self._save_snapshot()
 
 
 class AsyncClient(Client):
@@ -118,46 +204,157 @@ class AsyncClient(Client):
     Represents an async pikudhaoref client.
     """
 
-    __slots__ = ("loop",)
+    __slots__ = ("loop", "_loop_thread", "_owns_loop", "_task")
 
     def __init__(
         self,
         update_interval: Union[int, float] = 2,
         loop: asyncio.AbstractEventLoop = None,
         proxy: str = None,
+        zone_events: bool = False,
+        proxies: List[str] = None,
+        stale_after: float = 30,
+        snapshot_store: SnapshotStore = None,
+        snapshot_max_age: float = 60,
+        statistics: SirenStatistics = None,
+        recent_window: timedelta = timedelta(hours=1),
+        trace: bool = False,
+        use_uvloop: Optional[bool] = False,
+        background: bool = False,
+        polygons: AreaPolygons = None,
     ):
         """
         :param Union[int, float] update_interval: The update interval of the client.
+        :param asyncio.AbstractEventLoop loop: The event loop to poll on, defaults to the running loop or a new one.
+            The client only polls while its loop runs, sync hosts should pass background=True or run client.loop themselves.
+        :param bool zone_events: Whether to call the on_zone_siren and on_zone_siren_end events.
+        :param List[str] proxies: Proxies to rotate through when a poll fails.
+        :param float stale_after: The time without a successful poll after which on_stale is called.
+        :param SnapshotStore snapshot_store: A store to checkpoint the known sirens and the city cache to, the client warm-starts from it.
+        :param float snapshot_max_age: The age in seconds after which a snapshot restores only the city cache and not the known sirens.
+        :param SirenStatistics statistics: Rollups to update with every new siren.
+        :param timedelta recent_window: How long detected sirens are kept for the recent and last_alert methods.
+        :param bool trace: Whether to record a trace of every poll, see dump_trace.
+        :param Optional[bool] use_uvloop: Whether an event loop created by the client uses uvloop, None uses it if it is installed, defaults to False.
+        :param bool background: Whether to poll on a dedicated event loop thread, for sync hosts, see run and close.
+        :param AreaPolygons polygons: The alert area polygons, see alerted_at.
         """
 
         super().__init__()
 
-        self.loop = loop or asyncio.get_event_loop()
+        self._loop_thread = None
+        if loop is None and background:
+            self._loop_thread = LoopThread(use_uvloop)
+            loop = self._loop_thread.loop
+
+        self.loop = loop or running_loop()
+        # A loop the client created is closed by close.
+        self._owns_loop = self.loop is None
+        if self._owns_loop:
+            self.loop = new_event_loop(use_uvloop)
+
         self.update_interval = update_interval
-        self.http = AsyncHTTPClient(loop=loop, proxy=proxy)
+        self.tracer = Tracer() if trace else None
+        self.http = AsyncHTTPClient(proxy=proxy, proxies=proxies, tracer=self.tracer)
+        self.health = PollerHealth(stale_after)
 
         self._initialized = False
+        self._stale_city_data = False
+        self._localization_table = None
         self.closed = False
-        self.city_cache = []
+        self.city_cache = CityCache()
+        self.city_index = None
         self._known_sirens = []
-
-        loop.create_task(self._handle_sirens())
+        self.zone_events = zone_events
+        self._known_zones = {}
+        self._subscriptions = []
+        self.snapshot_store = snapshot_store
+        self.snapshot_max_age = snapshot_max_age
+        self.statistics = statistics
+        self.recent_sirens = RecentSirens(recent_window)
+        self.polygons = polygons
+
+        if self.loop.is_running() and self.loop is not running_loop():
+            self._task = asyncio.run_coroutine_threadsafe(
+                self._handle_sirens(), self.loop
+            )
+        else:
+            self._task = self.loop.create_task(self._handle_sirens())
 
     async def initialize(self):
-        if not self._initialized:
+        if not self._initialized and not self._restore_snapshot():
             await self.http.initialize_city_data()
+            self._cache_city_data()
 
-            for city in self.http.city_data:
-                self.city_cache.append(self.get_city(city["he"]))
-
-            self._initialized = False
+            self._initialized = True
 
     async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_value, exc_traceback):
         self.closed = True
-        await self.http.session.close()
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+        await self.http.close()
+
+        for subscription in list(self._subscriptions):
+            await subscription.close()
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Runs a coroutine on the client loop from sync code and waits for its result.
+        Must not be called from the client loop itself.
+
+        :param Coroutine coroutine: The coroutine.
+        :return: The coroutine result.
+        :rtype: Any
+        """
+
+        if self.loop.is_running():
+            return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+        return self.loop.run_until_complete(coroutine)
+
+    def close(self) -> None:
+        """
+        Closes the client from sync code, and stops its loop thread or closes the event loop it created.
+
+        :return: None
+        :rtype: None
+        """
+
+        self.run(self.__aexit__(None, None, None))
+
+        if self._loop_thread is not None:
+            self._loop_thread.stop()
+        elif self._owns_loop and not self.loop.is_closed():
+            # Let the cancelled poller finish before the loop is closed.
+            self.loop.run_until_complete(
+                asyncio.gather(self._task, return_exceptions=True)
+            )
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    def sirens(
+        self,
+        event: str = "on_siren",
+        maxsize: int = 64,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ) -> AsyncSirenSubscription:
+        """
+        Subscribes to the batches of an event.
+        Each subscription has its own bounded queue, iterate it with async for to consume the batches.
+
+        :param str event: The event name.
+        :param int maxsize: The maximum amount of pending batches.
+        :param OverflowPolicy policy: What to do when the consumer falls behind.
+        :raises: ValueError: maxsize is less than 1.
+        :return: The subscription.
+        :rtype: AsyncSirenSubscription
+        """
+
+        return AsyncSirenSubscription(self._subscriptions, event, maxsize, policy)
 
     async def get_history(
         self,
@@ -170,44 +367,65 @@ class AsyncClient(Client):
         else:
             sirens = await self.http.get_history(mode.value)
 
-        if get_city:
-            for siren in sirens:
-                siren["data"] = self.get_city(siren["data"])
-
-        return [Siren.from_raw(x) for x in sirens]
+        return Siren.from_raw_many(sirens, self.get_city if get_city else None)
 
     async def current_sirens(self) -> List[Siren]:
-        return [
-            Siren(self.get_city(x), datetime.utcnow())
-            for x in self.remove_duplicates(await self.http.get_current_sirens())
-        ]
+        city_names = self.remove_duplicates(await self.http.get_current_sirens())
+
+        with span(self.tracer, "resolve_cities", cities=len(city_names)):
+            return [Siren(self.get_city(x), datetime.utcnow()) for x in city_names]
 
     async def create_map(self, cities: List[City], key: str = None) -> BytesIO:
         return await self.http.create_map(cities, key)
 
+    async def _poll(self) -> List[Tuple[str, Any]]:
+        if not self.health.circuit_breaker.allow_request():
+            return self._poll_failed(None)
+
+        try:
+            sirens = await self.current_sirens()
+        except Exception as e:
+            return self._poll_failed(e)
+
+        self.health.record_success()
+        return self._process_sirens(sirens)
+
+    async def _refresh_city_data(self) -> None:
+        try:
+            await self.http.initialize_city_data()
+        except Exception:
+            return  # Keep the restored city data, it is refreshed on the next start.
+
+        self._replace_city_cache()
+
     async def _handle_sirens(self):
         await self.initialize()
 
+        refresh = None
+        if self._stale_city_data:
+            refresh = asyncio.ensure_future(self._refresh_city_data())
+
         while not self.closed:
-            await asyncio.sleep(self.update_interval)
-            sirens = await self.current_sirens()
+            await asyncio.sleep(self.health.next_delay(self.update_interval))
+
+            with span(self.tracer, "poll"):
+                events = await self._poll()
+
+                for name, argument in events:
+                    with span(self.tracer, "call_async_event", event=name):
+                        await self.call_async_event(name, argument)
+
+                    for subscription in list(self._subscriptions):
+                        if subscription.event == name:
+                            try:
+                                await subscription.put(argument)
+                            except Exception:
+                                # A broken subscription must not stop the poller.
+                                await subscription.close()
+
+                # After the events, so the checkpoint does not delay them.
+                if any(name in ("on_siren", "on_siren_end") for name, _ in events):
+                    await self.loop.run_in_executor(None, self._save_snapshot)
 
-            new_sirens = [
-                siren
-                for siren in sirens
-                if siren.city not in [siren.city for siren in self._known_sirens]
-            ]
-            if new_sirens:
-                self._known_sirens.extend(new_sirens)
-                await self.call_async_event("on_siren", new_sirens)
-
-            if not sirens:
-                ended_sirens = [
-                    x
-                    for x in self._known_sirens
-                    if x.city not in [siren.city for siren in sirens]
-                ]
-                if ended_sirens:
-                    await self.call_async_event("on_siren_end", ended_sirens)
-
-                self._known_sirens = []
+        if refresh is not None:
+            refresh.cancel()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from enum import Enum
 
-__all__ = ("HistoryMode", "MatchMode")
+__all__ = ("HistoryMode", "MatchMode", "OverflowPolicy", "CircuitState")
 
 
 class HistoryMode(Enum):
@@ -15,3 +15,16 @@ class HistoryMode(Enum):
 class MatchMode(Enum):
     EXACT = 0
     IN = 1
+    FUZZY = 2
+
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = 0
+    COALESCE = 1
+    BLOCK = 2
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
@@ -1,7 +1,13 @@
-__all__ = ("AccessDenied",)
+__all__ = ("AccessDenied", "InvalidResponse")
 
 
 class AccessDenied(Exception):
     """
     Raised when the user tries to access the pikudhaoref API from outside of Israel.
     """
+
+
+class InvalidResponse(Exception):
+    """
+    Raised when the pikudhaoref API returns a body which is not valid JSON, for example a truncated response.
+    """
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple, Union, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .city import City
+    from .siren import Siren
+
+__all__ = (
+    "EARTH_RADIUS_KM",
+    "BatchAnalysis",
+    "coordinates",
+    "countdowns",
+    "haversine_matrix",
+    "nearest",
+    "min_countdown_by_region",
+    "analyze_batch",
+)
+
+EARTH_RADIUS_KM = 6371.0088
+
+Location = Union["City", "Siren"]
+
+
+def _city(item: Location):
+    return getattr(item, "city", item)
+
+
+def _known(city) -> bool:
+    # Cities missing from the city data are strings or placeholders at (0, 0).
+    return not isinstance(city, str) and (city.lat, city.lng) != (0, 0)
+
+
+def coordinates(items: Sequence[Location]) -> np.ndarray:
+    """
+    Returns the coordinates of the cities or sirens.
+    Unknown cities have NaN coordinates.
+
+    :param Sequence[Union[City, Siren]] items: The cities or sirens.
+    :return: A (n, 2) array of latitudes and longitudes, in degrees.
+    :rtype: np.ndarray
+    """
+
+    array = np.full((len(items), 2), np.nan)
+
+    for i, item in enumerate(items):
+        city = _city(item)
+        if _known(city):
+            array[i] = city.lat, city.lng
+
+    return array
+
+
+def countdowns(items: Sequence[Location]) -> np.ndarray:
+    """
+    Returns the countdowns of the cities or sirens.
+    Unknown cities have a NaN countdown.
+
+    :param Sequence[Union[City, Siren]] items: The cities or sirens.
+    :return: A (n,) array of countdowns, in seconds.
+    :rtype: np.ndarray
+    """
+
+    return np.array(
+        [
+            city.countdown.seconds if _known(city) else np.nan
+            for city in map(_city, items)
+        ],
+        dtype=float,
+    )
+
+
+def haversine_matrix(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Returns the pairwise great-circle distances between two sets of coordinates.
+
+    :param np.ndarray first: A (n, 2) array of latitudes and longitudes, in degrees.
+    :param np.ndarray second: A (m, 2) array of latitudes and longitudes, in degrees.
+    :return: A (n, m) array of distances, in kilometers.
+    :rtype: np.ndarray
+    """
+
+    first = np.radians(np.asarray(first, dtype=float).reshape(-1, 2))
+    second = np.radians(np.asarray(second, dtype=float).reshape(-1, 2))
+
+    lat1, lng1 = first[:, 0, None], first[:, 1, None]
+    lat2, lng2 = second[None, :, 0], second[None, :, 1]
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest(
+    assets: np.ndarray, items: Sequence[Location]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the nearest city or siren to every asset.
+
+    :param np.ndarray assets: A (n, 2) array of latitudes and longitudes, in degrees.
+    :param Sequence[Union[City, Siren]] items: The cities or sirens.
+    :return: The index of the nearest item per asset (-1 if there is none) and its distance in kilometers (NaN if there is none).
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+
+    return _nearest(haversine_matrix(assets, coordinates(items)))
+
+
+def _nearest(distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    if distances.shape[1] == 0:
+        empty = np.full(distances.shape[0], np.nan)
+        return np.full(distances.shape[0], -1), empty
+
+    filled = np.where(np.isnan(distances), np.inf, distances)
+    indices = np.argmin(filled, axis=1)
+    minimums = filled[np.arange(len(indices)), indices]
+
+    found = np.isfinite(minimums)
+    return np.where(found, indices, -1), np.where(found, minimums, np.nan)
+
+
+def min_countdown_by_region(items: Sequence[Location]) -> Dict[str, int]:
+    """
+    Returns the minimum countdown of every zone.
+
+    :param Sequence[Union[City, Siren]] items: The cities or sirens.
+    :return: The hebrew zone names and their minimum countdown, in seconds.
+    :rtype: Dict[str, int]
+    """
+
+    seconds = countdowns(items)
+    zones = [city.zone.he if _known(city) else None for city in map(_city, items)]
+
+    known = ~np.isnan(seconds) & np.array([x is not None for x in zones], dtype=bool)
+    if not known.any():
+        return {}
+
+    names, inverse = np.unique(
+        np.array(zones, dtype=object)[known].astype(str), return_inverse=True
+    )
+    minimums = np.full(len(names), np.inf)
+    np.minimum.at(minimums, inverse, seconds[known])
+
+    return {str(name): int(minimum) for name, minimum in zip(names, minimums)}
+
+
+@dataclass
+class BatchAnalysis:
+    """
+    Represents the analysis of a siren batch against a set of assets.
+    """
+
+    distances: np.ndarray
+    nearest_indices: np.ndarray
+    nearest_distances: np.ndarray
+    min_countdowns: Dict[str, int]
+    items: List[Location]
+
+    def nearest_item(self, asset: int) -> Union[Location, None]:
+        index = self.nearest_indices[asset]
+        return None if index < 0 else self.items[index]
+
+
+def analyze_batch(
+    assets: Union[np.ndarray, Sequence[Tuple[float, float]]],
+    items: Sequence[Location],
+) -> BatchAnalysis:
+    """
+    Analyzes a siren batch against the assets in one batched call:
+    the distance matrix, the nearest alerted city per asset and the minimum countdown per zone.
+
+    :param Union[np.ndarray, Sequence[Tuple[float, float]]] assets: The asset latitudes and longitudes, in degrees.
+    :param Sequence[Union[City, Siren]] items: The alerted cities or sirens.
+    :return: The analysis.
+    :rtype: BatchAnalysis
+    """
+
+    items = list(items)
+    distances = haversine_matrix(np.asarray(assets, dtype=float), coordinates(items))
+    nearest_indices, nearest_distances = _nearest(distances)
+
+    return BatchAnalysis(
+        distances,
+        nearest_indices,
+        nearest_distances,
+        min_countdown_by_region(items),
+        items,
+    )
@@ -8,6 +8,7 @@ import asyncio
 
 from .utils import create_map_url_from_cities
 from .abc import HTTPClient
+from .trace import Tracer, span
 
 if TYPE_CHECKING:
     from .city import City
@@ -17,25 +18,46 @@ __all__ = ("SyncHTTPClient", "AsyncHTTPClient")
 
 
 class SyncHTTPClient(HTTPClient):
-    def __init__(self, session: requests.Session = None, proxy: str = None):
+    def __init__(
+        self,
+        session: requests.Session = None,
+        proxy: str = None,
+        proxies: List[str] = None,
+        timeout: float = 10,
+        initialize: bool = True,
+        tracer: Tracer = None,
+    ):
         self.session = session or requests.Session()
         self.city_data = {}
-        self.proxy = proxy
-        self.initialize_city_data()
+        self.proxies = self._proxy_list(proxy, proxies)
+        self.proxy = proxy or next(iter(self.proxies), None)
+        self.timeout = timeout
+        self.tracer = tracer
+
+        if tracer is not None:
+            self.session.hooks["response"].append(tracer.requests_hook)
+
+        if initialize:
+            self.initialize_city_data()
 
     def request(self, method: str, url: str, headers: Dict[str, str] = None) -> Any:
-        r = self.session.request(
-            method,
-            url,
-            headers=headers or {},
-            proxies=self.proxy and {"http": f"http://{self.proxy}/"},
-        )
-        return self.parse_response(r.text)
+        # The upstream URLs are https, so the proxy must be mapped for both schemes.
+        proxy = self.proxy and f"http://{self.proxy}/"
+
+        with span(self.tracer, "request", "http", url=url):
+            r = self.session.request(
+                method,
+                url,
+                headers=headers or {},
+                proxies=proxy and {"http": proxy, "https": proxy},
+                timeout=self.timeout,
+            )
+
+        with span(self.tracer, "parse_response"):
+            return self.parse_response(r.text)
 
     def initialize_city_data(self) -> None:
-        self.city_data = self._format_city_data(
-            self.request("GET", "https://www.tzevaadom.co.il/static/cities.json")
-        )
+        self.city_data = self._format_city_data(self.request("GET", self.CITIES_URL))
 
     def create_map(self, cities: List[City], key: str = None) -> BytesIO:
         return BytesIO(
@@ -48,7 +70,7 @@ class SyncHTTPClient(HTTPClient):
     def get_history(self, mode: int) -> List[dict]:
         return self.request(
             "GET",
-            f"https://www.oref.org.il//Shared/Ajax/GetAlarmsHistory.aspx?lang=he&mode={mode}",
+            f"{self.HISTORY_URL}?lang=he&mode={mode}",
         )
 
     def get_range_history(self, start: datetime, end: datetime) -> List[dict]:
@@ -57,18 +79,18 @@ class SyncHTTPClient(HTTPClient):
 
         return self.request(
             "GET",
-            f"https://www.oref.org.il//Shared/Ajax/GetAlarmsHistory.aspx?lang=he&mode=0&fromDate={start}&toDate={end}",
+            f"{self.HISTORY_URL}?lang=he&mode=0&fromDate={start}&toDate={end}",
         )
 
     def get_current_sirens(self) -> List[str]:
         headers = {
             "X-Requested-With": "XMLHttpRequest",
-            "Referer": "https://www.oref.org.il/",
+            "Referer": self.REFERER,
         }
 
         return self.request(
             "GET",
-            "https://www.oref.org.il/WarningMessages/Alert/alerts.json",
+            self.ALERTS_URL,
             headers=headers,
         ).get("data", [])
 
@@ -77,33 +99,56 @@ class AsyncHTTPClient(HTTPClient):
     def __init__(
         self,
         session: aiohttp.ClientSession = None,
-        loop: asyncio.BaseEventLoop = None,
+        loop: asyncio.BaseEventLoop = None,  # Unused, aiohttp no longer accepts a loop.
         proxy: str = None,
+        proxies: List[str] = None,
+        timeout: float = 10,
+        tracer: Tracer = None,
     ):
-        self.session = session or aiohttp.ClientSession(loop=loop)
-        self.proxy = proxy
+        # Created on first use so the session binds to the loop that runs the requests.
+        self.session = session
+        self.tracer = tracer
+        self.proxies = self._proxy_list(proxy, proxies)
+        self.proxy = proxy or next(iter(self.proxies), None)
+        self.timeout = timeout
         self.city_data = {}
 
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                trace_configs=self.tracer and [self.tracer.aiohttp_trace_config()],
+            )
+
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+
     async def request(
         self, method: str, url: str, headers: Dict[str, str] = None
     ) -> Any:
-        r = await self.session.request(
+        r = await self.get_session().request(
             method,
             url,
             headers=headers or {},
             proxy=self.proxy and f"http://{self.proxy}/",
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
         )
-        return self.parse_response(await r.text())
+        text = await r.text()
+
+        with span(self.tracer, "parse_response"):
+            return self.parse_response(text)
 
     async def initialize_city_data(self) -> None:
         self.city_data = self._format_city_data(
-            await self.request("GET", "https://www.tzevaadom.co.il/static/cities.json")
+            await self.request("GET", self.CITIES_URL)
         )
 
     async def get_history(self, mode: int) -> List[dict]:
         return await self.request(
             "GET",
-            f"https://www.oref.org.il//Shared/Ajax/GetAlarmsHistory.aspx?lang=he&mode={mode}",
+            f"{self.HISTORY_URL}?lang=he&mode={mode}",
         )
 
     async def get_range_history(self, start: datetime, end: datetime):
@@ -112,13 +157,13 @@ class AsyncHTTPClient(HTTPClient):
 
         return await self.request(
             "GET",
-            f"https://www.oref.org.il//Shared/Ajax/GetAlarmsHistory.aspx?lang=he&mode=0&fromDate={start}&toDate={end}",
+            f"{self.HISTORY_URL}?lang=he&mode=0&fromDate={start}&toDate={end}",
         )
 
     async def create_map(self, cities: List[City], key: str = None) -> BytesIO:
         return BytesIO(
             await (
-                await self.session.request(
+                await self.get_session().request(
                     "GET",
                     create_map_url_from_cities(cities, key),
                 )
@@ -128,13 +173,13 @@ class AsyncHTTPClient(HTTPClient):
     async def get_current_sirens(self) -> List[str]:
         headers = {
             "X-Requested-With": "XMLHttpRequest",
-            "Referer": "https://www.oref.org.il/",
+            "Referer": self.REFERER,
         }
 
         return (
             await self.request(
                 "GET",
-                "https://www.oref.org.il/WarningMessages/Alert/alerts.json",
+                self.ALERTS_URL,
                 headers=headers,
             )
         ).get("data", [])
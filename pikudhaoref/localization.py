@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .city import LANGUAGES, COUNTDOWN_TRANSLATIONS
+
+if TYPE_CHECKING:
+    from .siren import Siren
+
+__all__ = ("LocalizationTable",)
+
+DEFAULT_TEMPLATE = "{name} ({zone}) - {countdown}"
+
+
+class LocalizationTable:
+    """
+    Represents precomputed city strings in every language.
+    The columns are (cities, languages) arrays ordered by city id,
+    a missing translation falls back to hebrew.
+    """
+
+    __slots__ = ("ids", "columns", "_rows", "_rendered")
+
+    def __init__(self, city_data: List[Dict[str, Any]]):
+        """
+        :param List[Dict[str, Any]] city_data: The city data.
+        """
+
+        cities = sorted(city_data, key=lambda x: x["__id"])  # Sorted for binary search.
+
+        def column(values: List[Dict[str, str]]) -> np.ndarray:
+            return np.array(
+                [
+                    [x.get(language) or x["he"] for language in LANGUAGES]
+                    for x in values
+                ],
+                dtype=object,
+            ).reshape(len(values), len(LANGUAGES))
+
+        self.ids = np.array([city["__id"] for city in cities], dtype=np.int64)
+        self.columns: Dict[str, np.ndarray] = {
+            "name": column(cities),
+            "zone": column([city["area"] for city in cities]),
+            "countdown": column(
+                [COUNTDOWN_TRANSLATIONS[city["countdown"]] for city in cities]
+            ),
+        }
+        self._rows: Dict[int, int] = {
+            city_id: row for row, city_id in enumerate(self.ids.tolist())
+        }
+        self._rendered: Dict[Tuple[str, str], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def language_index(language: str) -> int:
+        """
+        Returns the column index of the language.
+
+        :param str language: The language code.
+        :raises: ValueError: The language is not supported.
+        :return: The column index.
+        :rtype: int
+        """
+
+        try:
+            return LANGUAGES.index(language)
+        except ValueError:
+            raise ValueError(
+                f"Unsupported language {language!r}, expected one of {LANGUAGES}."
+            ) from None
+
+    def indices(self, sirens: Sequence[Siren]) -> np.ndarray:
+        """
+        Returns the row of every siren city, -1 for cities missing from the table.
+
+        :param Sequence[Siren] sirens: The sirens.
+        :return: The rows.
+        :rtype: np.ndarray
+        """
+
+        ids = np.array(
+            [-1 if x.city_id is None else x.city_id for x in sirens], dtype=np.int64
+        )
+        if not len(self.ids):
+            return np.full(len(ids), -1)
+
+        rows = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return np.where(self.ids[rows] == ids, rows, -1)
+
+    def lookup(self, sirens: Sequence[Siren], field: str, language: str) -> List[str]:
+        """
+        Returns a column value for every siren.
+        Cities missing from the table use their hebrew name.
+
+        :param Sequence[Siren] sirens: The sirens.
+        :param str field: The column, name, zone or countdown.
+        :param str language: The language code.
+        :return: The values.
+        :rtype: List[str]
+        """
+
+        return self._take(self.columns[field][:, self.language_index(language)], sirens)
+
+    def render(
+        self, sirens: Sequence[Siren], language: str, template: str = DEFAULT_TEMPLATE
+    ) -> List[str]:
+        """
+        Renders a batch of sirens in one pass.
+        Every city is rendered once per language and template, later batches only index the rendered column.
+        Cities missing from the table are rendered as their hebrew name.
+
+        :param Sequence[Siren] sirens: The sirens.
+        :param str language: The language code.
+        :param str template: A format string with the name, zone and countdown fields.
+        :return: The rendered sirens.
+        :rtype: List[str]
+        """
+
+        key = (language, template)
+        rendered = self._rendered.get(key)
+
+        if rendered is None:
+            index = self.language_index(language)
+            rendered = [
+                template.format(name=name, zone=zone, countdown=countdown)
+                for name, zone, countdown in zip(
+                    self.columns["name"][:, index],
+                    self.columns["zone"][:, index],
+                    self.columns["countdown"][:, index],
+                )
+            ]
+            self._rendered[key] = rendered
+
+        return self._take(rendered, sirens)
+
+    def _take(self, column: List[str], sirens: Sequence[Siren]) -> List[str]:
+        rows = self._rows
+        values = []
+
+        for siren in sirens:
+            city = siren.city
+            row = rows.get(getattr(city, "id", None))
+
+            if row is None:
+                values.append(city if isinstance(city, str) else city.name.he)
+            else:
+                values.append(column[row])
+
+        return values
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from bisect import bisect_right
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .enums import MatchMode
+
+__all__ = ("normalize_city_name", "edit_distance", "CityNameIndex")
+
+_LANGUAGES = ("he", "en", "ru", "ar", "es")
+
+# Hyphens, maqaf, apostrophes, geresh, gershayim and other punctuation oref and tzevaadom disagree on.
+_PUNCTUATION = re.compile(r"[\-־‐-―'׳‘’`\"״“”.,()]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_city_name(city_name: str) -> str:
+    """
+    Normalizes a city name for comparison.
+    Removes niqqud and other diacritics, punctuation and repeated whitespace.
+
+    :param str city_name: The city name.
+    :return: The normalized city name.
+    :rtype: str
+    """
+
+    decomposed = unicodedata.normalize("NFKD", city_name)
+    stripped = "".join(x for x in decomposed if unicodedata.category(x) != "Mn")
+    stripped = _PUNCTUATION.sub(" ", stripped)
+
+    return _WHITESPACE.sub(" ", stripped).strip().casefold()
+
+
+def edit_distance(first: str, second: str, max_distance: int) -> Optional[int]:
+    """
+    Returns the levenshtein distance between the strings if it does not exceed max_distance.
+
+    :param str first: The first string.
+    :param str second: The second string.
+    :param int max_distance: The maximum distance.
+    :return: The distance or None if the distance exceeds max_distance.
+    :rtype: Optional[int]
+    """
+
+    if abs(len(first) - len(second)) > max_distance:
+        return None
+
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        current = [i]
+
+        for j, second_char in enumerate(second, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (first_char != second_char),
+                )
+            )
+
+        if min(current) > max_distance:
+            return None
+
+        previous = current
+
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+def _trigrams(normalized: str) -> List[str]:
+    padded = f" {normalized} "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+class CityNameIndex:
+    """
+    Represents an index over the city data names, precomputed once when the city data is loaded.
+    """
+
+    __slots__ = (
+        "city_data",
+        "_exact",
+        "_joined",
+        "_offsets",
+        "_offset_cities",
+        "_normalized",
+        "_trigrams",
+    )
+
+    def __init__(self, city_data: List[Dict[str, Any]]):
+        """
+        :param List[Dict[str, Any]] city_data: The city data.
+        """
+
+        self.city_data = city_data
+
+        self._exact: Dict[str, Dict[str, Any]] = {}
+        self._normalized: Dict[str, Dict[str, Any]] = {}
+        self._trigrams: Dict[str, List[str]] = {}
+
+        # All the names joined in city data order, for a single str.find substring search.
+        names = []
+        self._offsets: List[int] = []
+        self._offset_cities: List[Dict[str, Any]] = []
+        offset = 0
+
+        for city in city_data:
+            for language in _LANGUAGES:
+                name = city.get(language)
+                if not name:
+                    continue
+
+                self._exact.setdefault(name, city)
+
+                names.append(name)
+                self._offsets.append(offset)
+                self._offset_cities.append(city)
+                offset += len(name) + 1
+
+                normalized = normalize_city_name(name)
+                if normalized in self._normalized:
+                    continue
+
+                self._normalized[normalized] = city
+                for trigram in set(_trigrams(normalized)):
+                    self._trigrams.setdefault(trigram, []).append(normalized)
+
+        self._joined = "\n".join(names)
+
+    def match(self, city_name: str, match_mode: MatchMode) -> Optional[Dict[str, Any]]:
+        """
+        Returns the first city dictionary which matches the name in the match mode.
+        MatchMode.FUZZY compares names by edit distance, see fuzzy.
+
+        :param str city_name: The city name.
+        :param MatchMode match_mode: The match mode.
+        :return: The city dictionary or None if it cannot be found.
+        :rtype: Optional[Dict[str, Any]]
+        """
+
+        matches = {
+            MatchMode.EXACT: self.exact,
+            MatchMode.IN: self.contains,
+            MatchMode.FUZZY: self.fuzzy,
+        }
+
+        return matches[match_mode](city_name)
+
+    def exact(self, city_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the city dictionary with the exact name.
+
+        :param str city_name: The city name.
+        :return: The city dictionary or None if it cannot be found.
+        :rtype: Optional[Dict[str, Any]]
+        """
+
+        return self._exact.get(city_name)
+
+    def contains(self, city_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the first city dictionary with a name that contains the city name.
+
+        :param str city_name: The city name.
+        :return: The city dictionary or None if it cannot be found.
+        :rtype: Optional[Dict[str, Any]]
+        """
+
+        if not city_name or "\n" in city_name:
+            return None
+
+        position = self._joined.find(city_name)
+        if position == -1:
+            return None
+
+        return self._offset_cities[bisect_right(self._offsets, position) - 1]
+
+    def normalized(self, city_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the city dictionary with the same normalized name,
+        names which only differ in niqqud, punctuation such as geresh and hyphens, case or whitespace.
+
+        :param str city_name: The city name.
+        :return: The city dictionary or None if it cannot be found.
+        :rtype: Optional[Dict[str, Any]]
+        """
+
+        return self._normalized.get(normalize_city_name(city_name))
+
+    def fuzzy(
+        self, city_name: str, max_distance: int = 2, max_candidates: int = 16
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns the city dictionary with the closest normalized name.
+        Candidates are chosen by shared trigrams and compared with a bounded edit distance,
+        a name equally close to two cities matches neither.
+        Distinct localities can be a single edit apart, so this is never used by get_city.
+
+        :param str city_name: The city name.
+        :param int max_distance: The maximum edit distance between the normalized names.
+        :param int max_candidates: The amount of trigram candidates to compare.
+        :return: The city dictionary or None if no name is close enough.
+        :rtype: Optional[Dict[str, Any]]
+        """
+
+        normalized = normalize_city_name(city_name)
+
+        city = self._normalized.get(normalized)
+        if city is not None:
+            return city
+
+        counter = Counter()
+        for trigram in set(_trigrams(normalized)):
+            counter.update(self._trigrams.get(trigram, ()))
+
+        max_distance = min(max_distance, len(normalized) // 3)
+        best, best_distance, ambiguous = None, max_distance, False
+
+        for candidate, _ in counter.most_common(max_candidates):
+            distance = edit_distance(normalized, candidate, best_distance)
+            if distance is None:
+                continue
+
+            if best is None or distance < best_distance:
+                best, best_distance, ambiguous = candidate, distance, False
+            elif self._normalized[candidate] is not self._normalized[best]:
+                ambiguous = True
+
+        return None if best is None or ambiguous else self._normalized[best]
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import json
+from typing import (
+    Collection,
+    Dict,
+    Hashable,
+    List,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+__all__ = ("AreaPolygons",)
+
+Ring = Sequence[Tuple[float, float]]
+Points = Union[np.ndarray, Sequence[Tuple[float, float]]]
+
+
+class AreaPolygons:
+    """
+    Represents alert area polygons with a grid index over their bounding boxes.
+    Points are tested against the candidate polygons of their grid cell with a vectorized
+    even-odd ray cast, so holes and multi-part areas are supported.
+    """
+
+    __slots__ = (
+        "keys",
+        "cell_size",
+        "bounds",
+        "_edges",
+        "_offsets",
+        "_origin",
+        "_shape",
+        "_grid",
+    )
+
+    def __init__(self, areas: Dict[Hashable, Sequence[Ring]], cell_size: float = 0.05):
+        """
+        :param Dict[Hashable, Sequence[Ring]] areas: The rings of every area, as (lat, lng) pairs in degrees.
+            The key is the city id or the hebrew city name.
+        :param float cell_size: The grid cell size, in degrees.
+        """
+
+        self.keys: List[Hashable] = list(areas)
+        self.cell_size = cell_size
+
+        edges, offsets, bounds = [], [0], []
+        for rings in areas.values():
+            rings = [np.asarray(ring, dtype=float).reshape(-1, 2) for ring in rings]
+            rings = [ring for ring in rings if len(ring)]
+
+            for ring in rings:
+                # (lat1, lng1, lat2, lng2) for every edge, including the closing one.
+                edges.append(np.hstack([ring, np.roll(ring, -1, axis=0)]))
+
+            offsets.append(offsets[-1] + sum(len(ring) for ring in rings))
+
+            if rings:
+                stacked = np.vstack(rings)
+                bounds.append((*stacked.min(axis=0), *stacked.max(axis=0)))
+            else:
+                bounds.append((np.nan,) * 4)
+
+        self._edges = np.vstack(edges) if edges else np.empty((0, 4))
+        self._offsets = np.array(offsets)
+        self.bounds = np.array(bounds, dtype=float).reshape(-1, 4)
+
+        self._build_grid()
+
+    @classmethod
+    def from_geojson(
+        cls, path: str, key_property: str = "name", cell_size: float = 0.05
+    ) -> AreaPolygons:
+        """
+        Loads the areas from a GeoJSON file of Polygon and MultiPolygon features.
+
+        :param str path: The file path.
+        :param str key_property: The feature property with the city id or the hebrew city name.
+        :param float cell_size: The grid cell size, in degrees.
+        :raises: ValueError: A feature has an unsupported geometry.
+        :return: The areas.
+        :rtype: AreaPolygons
+        """
+
+        with open(path, encoding="utf-8") as f:
+            collection = json.load(f)
+
+        areas: Dict[Hashable, List[Ring]] = {}
+        for feature in collection["features"]:
+            geometry = feature["geometry"]
+
+            if geometry["type"] == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry["type"] == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                raise ValueError(f"Unsupported geometry {geometry['type']}.")
+
+            rings = areas.setdefault(feature["properties"][key_property], [])
+            for polygon in polygons:
+                # GeoJSON positions are (lng, lat).
+                rings.extend([(lat, lng) for lng, lat, *_ in ring] for ring in polygon)
+
+        return cls(areas, cell_size)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _build_grid(self) -> None:
+        known = ~np.isnan(self.bounds).any(axis=1)
+
+        if not known.any():
+            self._origin = np.zeros(2)
+            self._shape = (0, 0)
+            self._grid = {}
+            return
+
+        self._origin = self.bounds[known, :2].min(axis=0)
+        end = self.bounds[known, 2:].max(axis=0)
+        self._shape = tuple(
+            (np.floor((end - self._origin) / self.cell_size) + 1).astype(int)
+        )
+
+        cells: Dict[int, List[int]] = {}
+        for index in np.flatnonzero(known):
+            first = self._cell_indices(self.bounds[index, :2])
+            last = self._cell_indices(self.bounds[index, 2:])
+
+            for row in range(first[0], last[0] + 1):
+                for column in range(first[1], last[1] + 1):
+                    cells.setdefault(row * self._shape[1] + column, []).append(index)
+
+        self._grid: Dict[int, np.ndarray] = {
+            cell: np.array(x) for cell, x in cells.items()
+        }
+
+    def _cell_indices(self, points: np.ndarray) -> np.ndarray:
+        return np.floor((points - self._origin) / self.cell_size).astype(int)
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        indices = self._cell_indices(points)
+        inside = (
+            (indices >= 0).all(axis=1)
+            & (indices[:, 0] < self._shape[0])
+            & (indices[:, 1] < self._shape[1])
+        )
+
+        return np.where(inside, indices[:, 0] * self._shape[1] + indices[:, 1], -1)
+
+    def _candidates(
+        self, points: np.ndarray, allowed: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        cells = self._cells(points)
+        point_indices, area_indices = [], []
+
+        order = np.argsort(cells, kind="stable")
+        unique_cells, starts = np.unique(cells[order], return_index=True)
+
+        for cell, in_cell in zip(unique_cells, np.split(order, starts[1:])):
+            areas = self._grid.get(int(cell))  # Points outside the grid have cell -1.
+            if areas is None:
+                continue
+
+            areas = areas[allowed[areas]]
+            if not len(areas):
+                continue
+
+            point_indices.append(np.repeat(in_cell, len(areas)))
+            area_indices.append(np.tile(areas, len(in_cell)))
+
+        if not point_indices:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+        point_indices = np.concatenate(point_indices)
+        area_indices = np.concatenate(area_indices)
+
+        # Drop the pairs outside the area bounding box.
+        bounds = self.bounds[area_indices]
+        points = points[point_indices]
+        inside = (points >= bounds[:, :2]).all(axis=1) & (points <= bounds[:, 2:]).all(
+            axis=1
+        )
+
+        return point_indices[inside], area_indices[inside]
+
+    def _contains(self, area: int, points: np.ndarray) -> np.ndarray:
+        edges = self._edges[self._offsets[area] : self._offsets[area + 1]]
+        lat1, lng1, lat2, lng2 = (edges[:, i] for i in range(4))
+        lat, lng = points[:, 0, None], points[:, 1, None]
+
+        # Even-odd rule: count the edges a ray from the point towards +lng crosses.
+        spans = (lat1 > lat) != (lat2 > lat)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crossing = lng1 + (lat - lat1) * (lng2 - lng1) / (lat2 - lat1)
+
+        return np.count_nonzero(spans & (lng < crossing), axis=1) % 2 == 1
+
+    def locate(
+        self, points: Points, keys: Collection[Hashable] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the areas which contain the points.
+
+        :param Points points: A (n, 2) array of latitudes and longitudes, in degrees.
+        :param Collection[Hashable] keys: Only test the areas with these keys, defaults to all the areas.
+        :return: The point index and the area index of every (point, area) pair where the area contains the point.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+
+        if keys is None:
+            allowed = np.ones(len(self.keys), dtype=bool)
+        else:
+            keys = set(keys)
+            allowed = np.array([key in keys for key in self.keys], dtype=bool)
+
+        point_indices, area_indices = self._candidates(points, allowed)
+        if not len(area_indices):
+            return point_indices, area_indices
+
+        order = np.argsort(area_indices, kind="stable")
+        point_indices, area_indices = point_indices[order], area_indices[order]
+
+        areas, starts = np.unique(area_indices, return_index=True)
+        inside = np.concatenate(
+            [
+                self._contains(area, points[group])
+                for area, group in zip(areas, np.split(point_indices, starts[1:]))
+            ]
+        )
+
+        return point_indices[inside], area_indices[inside]
+
+    def areas_at(self, lat: float, lng: float) -> List[Hashable]:
+        """
+        Returns the keys of the areas which contain the point.
+
+        :param float lat: The latitude, in degrees.
+        :param float lng: The longitude, in degrees.
+        :return: The area keys.
+        :rtype: List[Hashable]
+        """
+
+        _, area_indices = self.locate([(lat, lng)])
+        return [self.keys[x] for x in area_indices]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .siren import Siren
+
+__all__ = ("RecentSirens",)
+
+
+def _timestamp(date: datetime) -> float:
+    # Live sirens have naive UTC datetimes, history sirens have aware ones.
+    return (
+        date.replace(tzinfo=timezone.utc) if date.tzinfo is None else date
+    ).timestamp()
+
+
+class RecentSirens:
+    """
+    Represents a time-bucketed ring buffer of recent sirens.
+    A bucket is reused once it falls out of the window, so expired sirens are evicted in O(1).
+    The last siren of every city is kept past the window for up to max_cities cities,
+    the city with the oldest last siren is evicted first.
+    """
+
+    __slots__ = (
+        "window",
+        "bucket_size",
+        "max_cities",
+        "_buckets",
+        "_bucket_ids",
+        "_last_seen",
+    )
+
+    def __init__(
+        self,
+        window: timedelta = timedelta(hours=1),
+        bucket_size: timedelta = timedelta(minutes=1),
+        max_cities: int = 4096,
+    ):
+        """
+        :param timedelta window: How long sirens are kept.
+        :param timedelta bucket_size: The time span of a single bucket.
+        :param int max_cities: The maximum amount of cities to keep the last siren of.
+        """
+
+        self.window = window
+        self.bucket_size = bucket_size
+        self.max_cities = max_cities
+
+        count = math.ceil(window / bucket_size)
+        self._buckets: List[List[Siren]] = [[] for _ in range(count)]
+        self._bucket_ids: List[int] = [-1] * count
+        self._last_seen: OrderedDict[str, Siren] = OrderedDict()
+
+    def _bucket_id(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_size.total_seconds())
+
+    def add(self, siren: Siren) -> None:
+        """
+        Adds a siren to the buffer.
+
+        :param Siren siren: The siren.
+        :return: None
+        :rtype: None
+        """
+
+        bucket_id = self._bucket_id(_timestamp(siren.datetime))
+        index = bucket_id % len(self._buckets)
+
+        if self._bucket_ids[index] != bucket_id:
+            if bucket_id < self._bucket_ids[index]:
+                return  # Older than the window.
+
+            self._buckets[index] = []
+            self._bucket_ids[index] = bucket_id
+
+        self._buckets[index].append(siren)
+
+        city = siren.city
+        city_name = city if isinstance(city, str) else city.name.he
+        last = self._last_seen.get(city_name)
+
+        if last is None or _timestamp(last.datetime) <= _timestamp(siren.datetime):
+            self._last_seen[city_name] = siren
+            self._last_seen.move_to_end(city_name)
+
+            if len(self._last_seen) > self.max_cities:
+                self._last_seen.popitem(last=False)
+
+    def recent(self, since: datetime = None) -> List[Siren]:
+        """
+        Returns the sirens in the window, in chronological order.
+
+        :param datetime since: Only return sirens since the datetime, defaults to the start of the window.
+        :return: The sirens.
+        :rtype: List[Siren]
+        """
+
+        now = datetime.now(timezone.utc).timestamp()
+        start = now - self.window.total_seconds()
+        if since is not None:
+            start = max(start, _timestamp(since))
+
+        start_bucket = self._bucket_id(start)
+        sirens = [
+            siren
+            for bucket_id, bucket in zip(self._bucket_ids, self._buckets)
+            if bucket_id >= start_bucket
+            for siren in bucket
+            if _timestamp(siren.datetime) >= start
+        ]
+
+        return sorted(sirens, key=lambda x: _timestamp(x.datetime))
+
+    def last_alert(self, city_name: str) -> Optional[Siren]:
+        """
+        Returns the last siren of the city, even if it is no longer in the window,
+        unless max_cities cities had a later siren.
+
+        :param str city_name: The hebrew city name.
+        :return: The siren or None if the city had no sirens.
+        :rtype: Optional[Siren]
+        """
+
+        return self._last_seen.get(city_name)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Optional
+
+from .enums import CircuitState
+
+__all__ = ("Backoff", "CircuitBreaker", "PollerHealth")
+
+
+class Backoff:
+    """
+    Represents an exponential backoff with jitter.
+    """
+
+    __slots__ = ("base", "factor", "maximum", "jitter")
+
+    def __init__(
+        self,
+        base: float = 1,
+        factor: float = 2,
+        maximum: float = 60,
+        jitter: float = 0.1,
+    ):
+        """
+        :param float base: The delay after the first failure, in seconds.
+        :param float factor: The factor the delay grows by after each failure.
+        :param float maximum: The maximum delay, in seconds.
+        :param float jitter: The maximum random fraction added to the delay.
+        """
+
+        self.base = base
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def delay(self, failures: int) -> float:
+        """
+        Returns the delay before the next attempt.
+
+        :param int failures: The amount of consecutive failures.
+        :return: The delay in seconds.
+        :rtype: float
+        """
+
+        delay = min(self.base * self.factor ** max(failures - 1, 0), self.maximum)
+        return delay * (1 + random.uniform(0, self.jitter))
+
+
+class CircuitBreaker:
+    """
+    Represents a circuit breaker.
+    After failure_threshold consecutive failures the circuit opens and requests are skipped
+    until recovery_timeout passes, then a single trial request is allowed.
+    """
+
+    __slots__ = ("failure_threshold", "recovery_timeout", "failures", "_opened_at")
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        """
+        :param int failure_threshold: The amount of consecutive failures which opens the circuit.
+        :param float recovery_timeout: The time the circuit stays open, in seconds.
+        """
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> CircuitState:
+        if self._opened_at is None:
+            return CircuitState.CLOSED
+
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return CircuitState.HALF_OPEN
+
+        return CircuitState.OPEN
+
+    def allow_request(self) -> bool:
+        """
+        Returns whether a request should be sent.
+
+        :return: Whether the circuit is not open.
+        :rtype: bool
+        """
+
+        return self.state != CircuitState.OPEN
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.failures >= self.failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+
+
+class PollerHealth:
+    """
+    Tracks the health of a polling loop: the backoff between failed polls,
+    the circuit breaker and whether the sirens are stale.
+    """
+
+    __slots__ = ("circuit_breaker", "backoff", "stale_after", "stale", "_last_success")
+
+    def __init__(
+        self,
+        stale_after: float = 30,
+        circuit_breaker: CircuitBreaker = None,
+        backoff: Backoff = None,
+    ):
+        """
+        :param float stale_after: The time without a successful poll after which the sirens are stale, in seconds.
+        :param CircuitBreaker circuit_breaker: The circuit breaker.
+        :param Backoff backoff: The backoff between failed polls.
+        """
+
+        self.stale_after = stale_after
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.backoff = backoff or Backoff()
+        self.stale = False
+
+        self._last_success = time.monotonic()
+
+    @property
+    def since_last_success(self) -> float:
+        return time.monotonic() - self._last_success
+
+    def next_delay(self, update_interval: float) -> float:
+        """
+        Returns the delay before the next poll.
+
+        :param float update_interval: The update interval of the client.
+        :return: The delay in seconds.
+        :rtype: float
+        """
+
+        failures = self.circuit_breaker.failures
+        if not failures:
+            return update_interval
+
+        return max(update_interval, self.backoff.delay(failures))
+
+    def record_success(self) -> None:
+        self.circuit_breaker.record_success()
+        self.stale = False
+        self._last_success = time.monotonic()
+
+    def record_failure(self) -> None:
+        self.circuit_breaker.record_failure()
+
+    def became_stale(self) -> bool:
+        """
+        Returns whether the sirens just became stale, True only once per stale period.
+
+        :return: Whether the sirens just became stale.
+        :rtype: bool
+        """
+
+        if self.stale or self.since_last_success < self.stale_after:
+            return False
+
+        self.stale = True
+        return True
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from concurrent.futures import Future
+from threading import Thread, Event, current_thread
+from typing import Any, Coroutine, Optional
+
+__all__ = (
+    "uvloop_available",
+    "gil_enabled",
+    "new_event_loop",
+    "running_loop",
+    "LoopThread",
+)
+
+
+def uvloop_available() -> bool:
+    """
+    Returns whether uvloop is installed.
+
+    :return: Whether uvloop is installed.
+    :rtype: bool
+    """
+
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def gil_enabled() -> bool:
+    """
+    Returns whether the interpreter runs with the GIL.
+    On free-threaded builds a LoopThread polls in parallel with the host threads.
+
+    :return: Whether the GIL is enabled.
+    :rtype: bool
+    """
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def new_event_loop(use_uvloop: Optional[bool] = False) -> asyncio.AbstractEventLoop:
+    """
+    Creates a new event loop.
+
+    :param Optional[bool] use_uvloop: Whether to use uvloop, None uses it if it is installed, defaults to False.
+    :raises: ImportError: use_uvloop is True and uvloop is not installed.
+    :return: The event loop.
+    :rtype: asyncio.AbstractEventLoop
+    """
+
+    if use_uvloop is None:
+        use_uvloop = uvloop_available()
+
+    if use_uvloop:
+        import uvloop
+
+        return uvloop.new_event_loop()
+
+    return asyncio.new_event_loop()
+
+
+def running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """
+    Returns the event loop running in the current thread.
+
+    :return: The event loop or None if no event loop is running.
+    :rtype: Optional[asyncio.AbstractEventLoop]
+    """
+
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class LoopThread:
+    """
+    Represents an event loop running forever in a dedicated daemon thread.
+    Lets sync hosts run an AsyncClient without managing a loop.
+    """
+
+    __slots__ = ("loop", "_thread", "_started")
+
+    def __init__(self, use_uvloop: Optional[bool] = False):
+        """
+        :param Optional[bool] use_uvloop: Whether to use uvloop, None uses it if it is installed, defaults to False.
+        """
+
+        self.loop = new_event_loop(use_uvloop)
+        self._started = Event()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """
+        Schedules the coroutine on the loop.
+
+        :param Coroutine coroutine: The coroutine.
+        :return: A future of the coroutine result.
+        :rtype: concurrent.futures.Future
+        """
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Coroutine, timeout: float = None) -> Any:
+        """
+        Runs the coroutine on the loop and waits for its result.
+
+        :param Coroutine coroutine: The coroutine.
+        :param float timeout: The timeout in seconds.
+        :return: The coroutine result.
+        :rtype: Any
+        """
+
+        return self.submit(coroutine).result(timeout)
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Stops the loop and waits for the thread to exit.
+
+        :param float timeout: The timeout in seconds.
+        :return: None
+        :rtype: None
+        """
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+        if self._thread is not current_thread():  # The loop can stop itself.
+            self._thread.join(timeout)
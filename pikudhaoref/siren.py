@@ -1,15 +1,33 @@
 from __future__ import annotations
 
+import struct
 from dataclasses import dataclass
 from datetime import datetime
 
 import pytz
-from typing import Dict, TYPE_CHECKING, Any
+from typing import (
+    Dict,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
 
 if TYPE_CHECKING:
-    from .city import City
+    from .city import City, CityZone
 
-__all__ = ("Siren",)
+__all__ = ("Siren", "ZoneSiren")
+
+_HEADER = struct.Struct("!I")
+_RECORD = struct.Struct("!idB")
+_NAME_LENGTH = struct.Struct("!H")
+
+_NO_ID = -1
+_AWARE = 1
 
 
 @dataclass
@@ -21,6 +39,14 @@ class Siren:
     city: City | str
     datetime: datetime
 
+    @property
+    def city_id(self) -> Optional[int]:
+        """
+        The id of the city, None if the city is unknown.
+        """
+
+        return getattr(self.city, "id", None)
+
     @classmethod
     def from_raw(cls, raw: Dict[str, Any]) -> Siren:
         """
@@ -38,3 +64,122 @@ class Siren:
             raw["data"],
             israel_timezone.localize(date).astimezone(pytz.utc),
         )
+
+    @classmethod
+    def from_raw_many(
+        cls,
+        raws: Iterable[Dict[str, Any]],
+        get_city: Callable[[str], Union[City, str]] = None,
+    ) -> List[Siren]:
+        """
+        Returns Siren objects from the dictionaries, without mutating them.
+        Every unique city name is resolved once and every unique date is parsed once.
+
+        :param Iterable[Dict[str, Any]] raws: The raw dictionaries.
+        :param Callable[[str], Union[City, str]] get_city: Resolves a city name, the name is kept if not given.
+        :return: The siren objects.
+        :rtype: List[Siren]
+        """
+
+        israel_timezone = pytz.timezone("Israel")
+        cities = {}
+        dates = {}
+        sirens = []
+
+        for raw in raws:
+            city_name = raw["data"]
+            city = cities.get(city_name)
+            if city is None:
+                city = cities[city_name] = (
+                    get_city(city_name) if get_city else city_name
+                )
+
+            alert_date = raw["alertDate"]
+            date = dates.get(alert_date)
+            if date is None:
+                date = dates[alert_date] = israel_timezone.localize(
+                    datetime.strptime(alert_date, "%Y-%m-%dT%H:%M:%S")
+                ).astimezone(pytz.utc)
+
+            sirens.append(cls(city, date))
+
+        return sirens
+
+    @staticmethod
+    def pack_many(sirens: List[Siren]) -> bytes:
+        """
+        Serializes the sirens into a compact binary format.
+        Cities are encoded by their id, cities without an id are encoded by their name.
+
+        :param List[Siren] sirens: The sirens.
+        :return: The serialized sirens.
+        :rtype: bytes
+        """
+
+        buffer = bytearray(_HEADER.pack(len(sirens)))
+
+        for siren in sirens:
+            date = siren.datetime
+            aware = date.tzinfo is not None
+            timestamp = (date if aware else date.replace(tzinfo=pytz.utc)).timestamp()
+
+            city_id = siren.city_id
+            buffer += _RECORD.pack(
+                _NO_ID if city_id is None else city_id, timestamp, _AWARE * aware
+            )
+
+            if city_id is None:
+                city = siren.city
+                name = (city if isinstance(city, str) else city.name.he).encode()
+                buffer += _NAME_LENGTH.pack(len(name)) + name
+
+        return bytes(buffer)
+
+    @classmethod
+    def unpack_many(cls, data: bytes, city_table: Mapping[int, City]) -> List[Siren]:
+        """
+        Deserializes sirens serialized by pack_many.
+        Cities which were encoded by their name are returned as the name (str).
+
+        :param bytes data: The serialized sirens.
+        :param Mapping[int, City] city_table: The city id to city table.
+        :return: The sirens.
+        :rtype: List[Siren]
+        """
+
+        (count,) = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+        sirens = []
+
+        for _ in range(count):
+            city_id, timestamp, flags = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+
+            if city_id == _NO_ID:
+                (length,) = _NAME_LENGTH.unpack_from(data, offset)
+                offset += _NAME_LENGTH.size
+                city = data[offset : offset + length].decode()
+                offset += length
+            else:
+                city = city_table[city_id]
+
+            date = datetime.fromtimestamp(timestamp, pytz.utc)
+            sirens.append(
+                cls(city, date if flags & _AWARE else date.replace(tzinfo=None))
+            )
+
+        return sirens
+
+
+@dataclass
+class ZoneSiren:
+    """
+    Represents the active sirens of a zone.
+    """
+
+    zone: CityZone
+    sirens: List[Siren]
+
+    @property
+    def cities(self) -> List[City | str]:
+        return [siren.city for siren in self.sirens]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+
+__all__ = ("SnapshotStore", "FileSnapshotStore", "MemorySnapshotStore")
+
+
+class SnapshotStore(ABC):
+    """
+    Represents a store for client snapshots.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def save(self, data: bytes) -> None:
+        """
+        Saves the snapshot, replacing the previous one.
+
+        :param bytes data: The snapshot.
+        :return: None
+        :rtype: None
+        """
+
+    @abstractmethod
+    def load(self) -> Optional[bytes]:
+        """
+        Loads the last saved snapshot.
+
+        :return: The snapshot or None if there is no snapshot.
+        :rtype: Optional[bytes]
+        """
+
+
+class FileSnapshotStore(SnapshotStore):
+    """
+    Represents a snapshot store which saves the snapshot to a file.
+    The file is replaced atomically, a crash while saving keeps the previous snapshot.
+    """
+
+    __slots__ = ("path",)
+
+    def __init__(self, path: str):
+        """
+        :param str path: The file path.
+        """
+
+        self.path = path
+
+    def save(self, data: bytes) -> None:
+        temporary_path = f"{self.path}.tmp"
+
+        with open(temporary_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary_path, self.path)
+
+    def load(self) -> Optional[bytes]:
+        try:
+            with open(self.path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class MemorySnapshotStore(SnapshotStore):
+    """
+    Represents a snapshot store which keeps the snapshot in memory.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self):
+        self.data: Optional[bytes] = None
+
+    def save(self, data: bytes) -> None:
+        self.data = data
+
+    def load(self) -> Optional[bytes]:
+        return self.data
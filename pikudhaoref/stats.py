@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .siren import Siren
+
+__all__ = ("Rollup", "SirenStatistics")
+
+
+def _as_utc(date: datetime) -> datetime:
+    # Live sirens have naive UTC datetimes, history sirens have aware ones.
+    return date.replace(tzinfo=timezone.utc) if date.tzinfo is None else date
+
+
+@dataclass
+class Rollup:
+    """
+    Represents incrementally updated siren statistics.
+    The hourly buckets of the last retention hours are kept as a ring of cumulative counts,
+    so window counts are constant-time and the memory is bounded.
+    """
+
+    count: int = 0
+    first: Optional[datetime] = None
+    last: Optional[datetime] = None
+    gap_count: int = 0
+    gap_total: timedelta = timedelta()
+    min_gap: Optional[timedelta] = None
+    max_gap: Optional[timedelta] = None
+    retention: int = 31 * 24
+    # The cumulative count before every hour of the ring, the count of the windowed sirens
+    # and the first and last hours of the ring, in hours since the epoch.
+    _cumulative: Optional[array] = field(default=None, repr=False, compare=False)
+    _end: int = field(default=0, repr=False, compare=False)
+    _first_hour: int = field(default=0, repr=False, compare=False)
+    _last_hour: Optional[int] = field(default=None, repr=False, compare=False)
+
+    @property
+    def mean_gap(self) -> Optional[timedelta]:
+        return self.gap_total / self.gap_count if self.gap_count else None
+
+    @property
+    def hourly(self) -> Dict[datetime, int]:
+        """
+        The siren count of every hour within the retention which had sirens.
+        """
+
+        if self._last_hour is None:
+            return {}
+
+        hourly = {}
+        for hour in range(self._first_hour, self._last_hour + 1):
+            end = self._end if hour == self._last_hour else self._before(hour + 1)
+            count = end - self._before(hour)
+
+            if count:
+                hourly[datetime.fromtimestamp(hour * 3600, timezone.utc)] = count
+
+        return hourly
+
+    def _before(self, hour: int) -> int:
+        return self._cumulative[hour % self.retention]
+
+    def _advance(self, hour: int) -> None:
+        if self._cumulative is None:
+            # Allocated on the first siren, most cities never have one.
+            self._cumulative = array("q", bytes(8 * self.retention))
+            self._first_hour = hour - self.retention + 1
+            self._last_hour = hour
+            return
+
+        # Hours skipped over had no sirens, only the last retention hours are kept.
+        for skipped in range(
+            max(self._last_hour + 1, hour - self.retention + 1), hour + 1
+        ):
+            self._cumulative[skipped % self.retention] = self._end
+
+        self._last_hour = hour
+        self._first_hour = max(self._first_hour, hour - self.retention + 1)
+
+    def add(self, date: datetime) -> None:
+        """
+        Adds a siren to the rollup.
+        Sirens older than the last siren update the counts but not the gaps,
+        sirens older than the retention update the counts but not the hourly buckets.
+
+        :param datetime date: The siren datetime, in UTC.
+        :return: None
+        :rtype: None
+        """
+
+        self.count += 1
+
+        hour = int(date.timestamp() // 3600)
+        if self._last_hour is None or hour > self._last_hour:
+            self._advance(hour)
+
+        if hour >= self._first_hour:
+            self._end += 1
+
+            # A late siren moves the cumulative counts of the later hours.
+            for later in range(hour + 1, self._last_hour + 1):
+                self._cumulative[later % self.retention] += 1
+
+        if self.first is None or date < self.first:
+            self.first = date
+
+        if self.last is None:
+            self.last = date
+        elif date >= self.last:
+            gap = date - self.last
+
+            self.gap_count += 1
+            self.gap_total += gap
+            self.min_gap = gap if self.min_gap is None else min(self.min_gap, gap)
+            self.max_gap = gap if self.max_gap is None else max(self.max_gap, gap)
+            self.last = date
+
+    def count_since(self, since: datetime) -> int:
+        """
+        Returns the amount of sirens since the datetime, at an hour resolution.
+        Windows longer than the retention are clamped to it.
+
+        :param datetime since: The datetime.
+        :return: The amount of sirens.
+        :rtype: int
+        """
+
+        hour = int(_as_utc(since).timestamp() // 3600)
+        if self._last_hour is None or hour > self._last_hour:
+            return 0
+
+        return self._end - self._before(max(hour, self._first_hour))
+
+
+class SirenStatistics:
+    """
+    Represents per-city, per-zone and total siren rollups.
+    The rollups are updated as sirens arrive, queries do not rescan the history.
+    """
+
+    __slots__ = ("retention", "total", "cities", "zones")
+
+    def __init__(self, retention: timedelta = timedelta(days=31)):
+        """
+        :param timedelta retention: How long the hourly buckets of count_since are kept.
+        """
+
+        self.retention = max(1, int(retention / timedelta(hours=1)))
+        self.total = Rollup(retention=self.retention)
+        self.cities: Dict[str, Rollup] = {}
+        self.zones: Dict[str, Rollup] = {}
+
+    def add(self, siren: Siren) -> None:
+        """
+        Adds a siren to the rollups.
+
+        :param Siren siren: The siren.
+        :return: None
+        :rtype: None
+        """
+
+        city = siren.city
+        date = _as_utc(siren.datetime)
+
+        self.total.add(date)
+
+        city_name = city if isinstance(city, str) else city.name.he
+        self._rollup(self.cities, city_name).add(date)
+
+        zone = getattr(city, "zone", None)
+        if zone is not None and zone.he is not None:
+            self._rollup(self.zones, zone.he).add(date)
+
+    def _rollup(self, rollups: Dict[str, Rollup], name: str) -> Rollup:
+        rollup = rollups.get(name)
+
+        if rollup is None:
+            rollup = rollups[name] = Rollup(retention=self.retention)
+
+        return rollup
+
+    def add_many(self, sirens: Iterable[Siren]) -> None:
+        """
+        Adds the sirens to the rollups in chronological order.
+        Use it to seed the rollups from get_history.
+
+        :param Iterable[Siren] sirens: The sirens.
+        :return: None
+        :rtype: None
+        """
+
+        for siren in sorted(sirens, key=lambda x: _as_utc(x.datetime)):
+            self.add(siren)
+
+    def city(self, city_name: str) -> Optional[Rollup]:
+        """
+        Returns the rollup of the city.
+
+        :param str city_name: The hebrew city name.
+        :return: The rollup or None if the city had no sirens.
+        :rtype: Optional[Rollup]
+        """
+
+        return self.cities.get(city_name)
+
+    def zone(self, zone_name: str) -> Optional[Rollup]:
+        """
+        Returns the rollup of the zone.
+
+        :param str zone_name: The hebrew zone name.
+        :return: The rollup or None if the zone had no sirens.
+        :rtype: Optional[Rollup]
+        """
+
+        return self.zones.get(zone_name)
+
+    def top_cities(self, amount: int = 10) -> List[Tuple[str, int]]:
+        """
+        Returns the cities with the most sirens.
+
+        :param int amount: The amount of cities.
+        :return: The city names and their siren counts.
+        :rtype: List[Tuple[str, int]]
+        """
+
+        return sorted(
+            ((name, rollup.count) for name, rollup in self.cities.items()),
+            key=lambda x: x[1],
+            reverse=True,
+        )[:amount]
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from threading import Condition
+from typing import Deque, List, Optional, TYPE_CHECKING
+
+from .enums import OverflowPolicy
+
+if TYPE_CHECKING:
+    from .siren import Siren
+
+__all__ = ("SirenSubscription", "SyncSirenSubscription", "AsyncSirenSubscription")
+
+
+class SirenSubscription:
+    """
+    Represents a bounded queue of siren batches with its own cursor.
+    Meant to be inherited.
+    """
+
+    __slots__ = (
+        "event",
+        "maxsize",
+        "policy",
+        "dropped",
+        "closed",
+        "_batches",
+        "_subscriptions",
+    )
+
+    def __init__(
+        self,
+        subscriptions: list,
+        event: str = "on_siren",
+        maxsize: int = 64,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
+        """
+        :param list subscriptions: The subscription list of the client, the subscription adds itself to it.
+        :param str event: The event name the subscription receives the batches of.
+        :param int maxsize: The maximum amount of pending batches.
+        :param OverflowPolicy policy: What to do when the queue is full.
+        :raises: ValueError: maxsize is less than 1.
+        """
+
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, got {maxsize}.")
+
+        self.event = event
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+
+        self._batches: Deque[List[Siren]] = deque()
+        self._subscriptions = subscriptions
+        self._subscriptions.append(self)
+
+    def __len__(self) -> int:
+        return len(self._batches)
+
+    @property
+    def full(self) -> bool:
+        return len(self._batches) >= self.maxsize
+
+    def _put_nowait(self, batch: List[Siren]) -> None:
+        if self.full:
+            if self.policy == OverflowPolicy.COALESCE:
+                if isinstance(batch, list) and isinstance(self._batches[-1], list):
+                    self._batches[-1] = self._batches[-1] + batch
+                else:
+                    # Events which are not siren lists cannot be merged, the latest one wins.
+                    self._batches[-1] = batch
+                    self.dropped += 1
+
+                return
+
+            self._batches.popleft()  # OverflowPolicy.DROP_OLDEST
+            self.dropped += 1
+
+        self._batches.append(batch)
+
+    def _close(self) -> None:
+        self.closed = True
+
+        if self in self._subscriptions:
+            self._subscriptions.remove(self)
+
+
+class SyncSirenSubscription(SirenSubscription):
+    """
+    Represents a siren subscription of a SyncClient.
+    """
+
+    __slots__ = ("_condition",)
+
+    def __init__(self, *args, **kwargs):
+        # Before the subscription adds itself to the client, the poller may put right away.
+        self._condition = Condition()
+        super().__init__(*args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            batch = self.get()
+            if batch is None:
+                return
+
+            yield batch
+
+    def put(self, batch: List[Siren]) -> None:
+        """
+        Adds a batch to the queue, applying the overflow policy if the queue is full.
+        The OverflowPolicy.BLOCK policy blocks the poller until there is space.
+
+        :param List[Siren] batch: The batch.
+        :return: None
+        :rtype: None
+        """
+
+        with self._condition:
+            if self.policy == OverflowPolicy.BLOCK:
+                self._condition.wait_for(lambda: not self.full or self.closed)
+
+            if not self.closed:
+                self._put_nowait(batch)
+                self._condition.notify_all()
+
+    def get(self, timeout: float = None) -> Optional[List[Siren]]:
+        """
+        Returns the next batch.
+
+        :param float timeout: The timeout in seconds.
+        :return: The batch or None if the subscription is closed or the timeout expired.
+        :rtype: Optional[List[Siren]]
+        """
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._batches or self.closed, timeout)
+
+            if not self._batches:
+                return None
+
+            batch = self._batches.popleft()
+            self._condition.notify_all()
+            return batch
+
+    def close(self) -> None:
+        """
+        Closes the subscription, iteration stops once the pending batches are consumed.
+
+        :return: None
+        :rtype: None
+        """
+
+        with self._condition:
+            self._close()
+            self._condition.notify_all()
+
+
+class AsyncSirenSubscription(SirenSubscription):
+    """
+    Represents a siren subscription of an AsyncClient.
+    """
+
+    __slots__ = ("_condition",)
+
+    def __init__(self, *args, **kwargs):
+        # Before the subscription adds itself to the client, the poller may put right away.
+        self._condition = asyncio.Condition()
+        super().__init__(*args, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> List[Siren]:
+        batch = await self.get()
+        if batch is None:
+            raise StopAsyncIteration
+
+        return batch
+
+    async def put(self, batch: List[Siren]) -> None:
+        """
+        Adds a batch to the queue, applying the overflow policy if the queue is full.
+        The OverflowPolicy.BLOCK policy suspends the poller until there is space.
+
+        :param List[Siren] batch: The batch.
+        :return: None
+        :rtype: None
+        """
+
+        async with self._condition:
+            if self.policy == OverflowPolicy.BLOCK:
+                await self._condition.wait_for(lambda: not self.full or self.closed)
+
+            if not self.closed:
+                self._put_nowait(batch)
+                self._condition.notify_all()
+
+    async def get(self) -> Optional[List[Siren]]:
+        """
+        Returns the next batch.
+
+        :return: The batch or None if the subscription is closed.
+        :rtype: Optional[List[Siren]]
+        """
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._batches or self.closed)
+
+            if not self._batches:
+                return None
+
+            batch = self._batches.popleft()
+            self._condition.notify_all()
+            return batch
+
+    async def close(self) -> None:
+        """
+        Closes the subscription, iteration stops once the pending batches are consumed.
+
+        :return: None
+        :rtype: None
+        """
+
+        async with self._condition:
+            self._close()
+            self._condition.notify_all()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, ContextManager, Deque, Dict, Optional
+
+import aiohttp
+
+__all__ = ("Span", "Tracer", "span")
+
+
+@dataclass
+class Span:
+    """
+    Represents a timed section of the polling loop.
+    """
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread_id: int
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Records spans into a bounded in-memory buffer, the oldest spans are dropped once it is full.
+    The buffer can be dumped in the Chrome trace event format (chrome://tracing, Perfetto).
+    """
+
+    __slots__ = ("spans",)
+
+    def __init__(self, maxlen: int = 10000):
+        """
+        :param int maxlen: The maximum amount of spans to keep.
+        """
+
+        self.spans: Deque[Span] = deque(maxlen=maxlen)
+
+    def record(
+        self, name: str, start: float, end: float, category: str = "client", **args
+    ) -> None:
+        """
+        Records a span.
+
+        :param str name: The span name.
+        :param float start: The start, a time.perf_counter value.
+        :param float end: The end, a time.perf_counter value.
+        :param str category: The span category.
+        :param args: Additional span information.
+        :return: None
+        :rtype: None
+        """
+
+        self.spans.append(
+            Span(name, category, start, end - start, threading.get_ident(), args)
+        )
+
+    @contextmanager
+    def span(self, name: str, category: str = "client", **args):
+        """
+        A context manager which records the time spent inside it as a span.
+
+        :param str name: The span name.
+        :param str category: The span category.
+        :param args: Additional span information.
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter(), category, **args)
+
+    def requests_hook(self, response, *args, **kwargs) -> None:
+        """
+        A requests response hook which records the time until the response headers were received.
+        requests does not expose the connection phases, so DNS, TCP and TLS are part of this span.
+        """
+
+        end = time.perf_counter()
+        self.record(
+            "server",
+            end - response.elapsed.total_seconds(),
+            end,
+            "http",
+            url=response.url,
+            status=response.status_code,
+        )
+
+    def aiohttp_trace_config(self) -> aiohttp.TraceConfig:
+        """
+        Returns an aiohttp trace config which records the connection phases as spans.
+
+        :return: The trace config.
+        :rtype: aiohttp.TraceConfig
+        """
+
+        trace_config = aiohttp.TraceConfig()
+
+        phases = {
+            "request": (trace_config.on_request_start, trace_config.on_request_end),
+            "dns": (
+                trace_config.on_dns_resolvehost_start,
+                trace_config.on_dns_resolvehost_end,
+            ),
+            "connection_queued": (
+                trace_config.on_connection_queued_start,
+                trace_config.on_connection_queued_end,
+            ),
+            # aiohttp reports TCP and TLS as a single phase.
+            "connect": (
+                trace_config.on_connection_create_start,
+                trace_config.on_connection_create_end,
+            ),
+        }
+
+        for name, (start_signal, end_signal) in phases.items():
+            start_signal.append(self._aiohttp_start(name))
+            end_signal.append(self._aiohttp_end(name))
+
+        return trace_config
+
+    @staticmethod
+    def _aiohttp_start(name: str):
+        async def on_start(session, context, params):
+            setattr(context, f"{name}_start", time.perf_counter())
+
+        return on_start
+
+    def _aiohttp_end(self, name: str):
+        async def on_end(session, context, params):
+            start = getattr(context, f"{name}_start", None)
+            if start is not None:
+                self.record(name, start, time.perf_counter(), "http")
+
+        return on_end
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns the spans in the Chrome trace event format.
+
+        :return: The trace.
+        :rtype: Dict[str, Any]
+        """
+
+        pid = os.getpid()
+
+        return {
+            "traceEvents": [
+                {
+                    "name": x.name,
+                    "cat": x.category,
+                    "ph": "X",
+                    "ts": x.start * 1e6,
+                    "dur": x.duration * 1e6,
+                    "pid": pid,
+                    "tid": x.thread_id,
+                    "args": x.args,
+                }
+                for x in list(self.spans)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the spans to a Chrome trace JSON file.
+
+        :param str path: The file path.
+        :return: None
+        :rtype: None
+        """
+
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+
+
+def span(
+    tracer: Optional[Tracer], name: str, category: str = "client", **args
+) -> ContextManager:
+    """
+    Returns a span of the tracer, or a no-op context manager if tracing is disabled.
+
+    :param Optional[Tracer] tracer: The tracer.
+    :param str name: The span name.
+    :param str category: The span category.
+    :param args: Additional span information.
+    :return: The context manager.
+    :rtype: ContextManager
+    """
+
+    return nullcontext() if tracer is None else tracer.span(name, category, **args)
@@ -21,6 +21,7 @@ setup(
         "pytz",
         "numpy"
     ],
+    extras_require={"uvloop": ["uvloop"]},
     classifiers=[  # Optional
         # How mature is this project? Common values are
         #   3 - Alpha